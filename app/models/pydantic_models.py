@@ -1,19 +1,25 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
 
 class Stat(BaseModel):
     """Represents a single base statistic of a Pokémon."""
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="The name of the statistic (e.g., 'hp', 'attack').")
     base_stat: int = Field(..., description="The base value of the statistic.")
 
 class AbilityInfo(BaseModel):
     """Represents a Pokémon's ability."""
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="The name of the ability.")
     is_hidden: bool = Field(..., description="Indicates if this is a hidden ability.")
 
 class MoveInfo(BaseModel):
     """Represents a move a Pokémon can learn, with detailed info."""
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="The name of the move.")
     power: Optional[int] = Field(0, description="The power of the move. 0 for status moves.")
     move_type: str = Field(..., description="The type of the move (e.g., 'fire', 'water').")
@@ -21,12 +27,17 @@ class MoveInfo(BaseModel):
 
 class EvolutionInfo(BaseModel):
     """Represents the evolution chain information."""
+    model_config = ConfigDict(frozen=True)
+
     chain: List[str] = Field(..., description="An ordered list of Pokémon names in the evolution chain.")
 
 class PokemonData(BaseModel):
     """
     The comprehensive data model for a single Pokémon, designed to be exposed via the MCP resource.
+    Frozen, because instances are shared through the in-process Pokémon cache.
     """
+    model_config = ConfigDict(frozen=True)
+
     id: int
     name: str
     sprite_url: Optional[str] = Field(None, description="The URL for the Pokémon's default front sprite image.")
@@ -1,7 +1,15 @@
 import random
-from typing import List, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from . import metrics
 from ..models.pydantic_models import PokemonData, MoveInfo
-from . import llm_client
+
+if TYPE_CHECKING:
+    from .strategies import Strategy
 
 # (TYPE_EFFECTIVENESS dictionary remains the same)
 TYPE_EFFECTIVENESS = {
@@ -25,36 +33,286 @@ TYPE_EFFECTIVENESS = {
     'fairy': {'fighting': 2, 'poison': 0.5, 'dragon': 2, 'dark': 2, 'steel': 0.5}
 }
 
+# Dense form of TYPE_EFFECTIVENESS: TYPE_CHART[attacking_type_id, defending_type_id].
+# Types outside the chart (e.g. 'shadow') get the ID -1 and are treated as neutral.
+TYPE_NAMES = list(TYPE_EFFECTIVENESS)
+TYPE_IDS = {name: i for i, name in enumerate(TYPE_NAMES)}
+TYPE_CHART = np.ones((len(TYPE_NAMES), len(TYPE_NAMES)))
+for _attacking, _row in TYPE_EFFECTIVENESS.items():
+    for _defending, _multiplier in _row.items():
+        TYPE_CHART[TYPE_IDS[_attacking], TYPE_IDS[_defending]] = _multiplier
+# Plain Python rows are faster than NumPy indexing for single scalar lookups.
+_TYPE_CHART_ROWS = TYPE_CHART.tolist()
+
+
+def type_id(type_name: str) -> int:
+    return TYPE_IDS.get(type_name, -1)
+
+
+def type_effectiveness(move_type_id: int, defender_type_ids: Sequence[int]) -> float:
+    """Combined multiplier of a move type against all of the defender's types."""
+    if move_type_id < 0:
+        return 1.0
+    row = _TYPE_CHART_ROWS[move_type_id]
+    effectiveness = 1.0
+    for def_type_id in defender_type_ids:
+        if def_type_id >= 0:
+            effectiveness *= row[def_type_id]
+    return effectiveness
+
+
+# --- Battle rules (shared with the Monte Carlo simulator) ---
+MAX_TURNS = 50
+MAX_ATTACK_POINTS = 200
+ATTACK_POINT_REGEN = 40
+STARTING_STATUS_CHANCE = 0.3
+PARALYSIS_SKIP_CHANCE = 0.25
+STATUS_EFFECTS = ['Poisoned', 'Paralyzed', 'Burned']
+DAMAGING_STATUSES = ['Poisoned', 'Burned']
+
+# Seeds are stored as 32-bit values in replays.
+SEED_LIMIT = 2 ** 32
+NO_MOVE = -1
+
+_turn_seconds = metrics.histogram("battle_turn_seconds", "Wall time of one battle turn, including move decisions.")
+
+# Planning mode: the LLM's policy picks a move per (HP band, AP band).
+PLAN_HP_THRESHOLD = 0.5
+PLAN_AP_THRESHOLD = 100
+
+
+def plan_bands(pokemon: "BattlePokemon") -> Tuple[str, str]:
+    """The (HP band, AP band) a planned policy is keyed on."""
+    hp_band = "high_hp" if pokemon.current_hp > pokemon.max_hp * PLAN_HP_THRESHOLD else "low_hp"
+    ap_band = "high_ap" if pokemon.attack_points >= PLAN_AP_THRESHOLD else "low_ap"
+    return hp_band, ap_band
+
+
+def status_damage(max_hp: int) -> int:
+    """HP lost at the end of each turn to poison or burn."""
+    return max(1, max_hp // 8)
+
+
+STAT_NAMES = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+TEMPLATE_CACHE_SIZE = 2048
+
+
+class SpeciesTemplate:
+    """
+    Battle-ready form of a PokemonData, built once per species and shared by every battle: resolved
+    stats (in STAT_NAMES order), type IDs, and the damaging moves with a name -> index map.
+    """
+    __slots__ = ('id', 'name', 'types', 'type_ids', 'stats', 'moves', 'move_index')
 
-class BattlePokemon:
     def __init__(self, data: PokemonData):
+        self.id = data.id
         self.name = data.name.capitalize()
-        self.types = data.types
+        self.types = tuple(data.types)
+        self.type_ids = tuple(type_id(t) for t in data.types)
         stats = {s.name: s.base_stat for s in data.base_stats}
-        self.max_hp = stats.get('hp', 1)
+        self.stats = tuple(stats.get(name, 1) for name in STAT_NAMES)
+        self.moves = tuple(move for move in data.moves if move.power is not None and move.power > 0)
+        self.move_index = {move.name: i for i, move in enumerate(self.moves)}
+
+
+# id(PokemonData) -> (data, template); the data is kept so its id can't be reused while cached.
+_templates: "OrderedDict[int, Tuple[PokemonData, SpeciesTemplate]]" = OrderedDict()
+# (id(attacker template), id(defender template)) -> (attacker, defender, damage table)
+_damage_tables: "OrderedDict[Tuple[int, int], Tuple[SpeciesTemplate, SpeciesTemplate, Dict[str, Tuple[int, float]]]]" = OrderedDict()
+# Guards both caches: battles are built on the event loop and in worker threads (Monte Carlo runs).
+_cache_lock = threading.Lock()
+
+
+def species_template(data: PokemonData) -> SpeciesTemplate:
+    """The shared template for a PokemonData (cached, since PokemonData objects are frozen and reused)."""
+    with _cache_lock:
+        entry = _templates.get(id(data))
+        if entry is not None and entry[0] is data:
+            _templates.move_to_end(id(data))
+            return entry[1]
+    template = SpeciesTemplate(data)
+    with _cache_lock:
+        _templates[id(data)] = (data, template)
+        if len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return template
+
+
+class BattlePokemon:
+    """
+    One Pokémon's state in one battle. Everything but HP, status and AP is copied from its
+    SpeciesTemplate, so building one costs a handful of slot assignments.
+    """
+    __slots__ = (
+        'template', 'id', 'name', 'types', 'type_ids', 'max_hp', 'attack', 'defense', 'special_attack',
+        'special_defense', 'speed', 'moves', 'move_index', 'current_hp', 'status', 'attack_points',
+    )
+
+    def __init__(self, data: Union[PokemonData, SpeciesTemplate]):
+        template = data if isinstance(data, SpeciesTemplate) else species_template(data)
+        self.template = template
+        self.id = template.id
+        self.name = template.name
+        self.types = template.types
+        self.type_ids = template.type_ids
+        self.max_hp, self.attack, self.defense, self.special_attack, self.special_defense, self.speed = template.stats
+        self.moves = template.moves
+        self.move_index = template.move_index
         self.current_hp = self.max_hp
-        self.attack = stats.get('attack', 1)
-        self.defense = stats.get('defense', 1)
-        self.special_attack = stats.get('special-attack', 1)
-        self.special_defense = stats.get('special-defense', 1)
-        self.speed = stats.get('speed', 1)
-        self.moves = [move for move in data.moves if move.power is not None and move.power > 0]
         self.status: Optional[str] = None
-        self.attack_points = 200
+        self.attack_points = MAX_ATTACK_POINTS
+
+
+class LogCode:
+    """
+    Battle log event codes. Events are (code, *args) tuples; the comments give the args. Plain ints
+    rather than an Enum, since they are read on every action of every battle.
+    """
+    BATTLE_START = 0      # (p1 name, p2 name)
+    SEPARATOR = 1         # ()
+    MOVESET = 2           # (name, moves)
+    STARTING_STATUS = 3   # (name, status)
+    PLAN = 4              # (name, strategy text or None)
+    TURN = 5              # (turn number,)
+    PARALYZED = 6         # (name,)
+    STRATEGY = 7          # (strategy text,)
+    ATTACK = 8            # (attacker name, move name, damage, effectiveness)
+    HP = 9                # (defender name, defender HP, defender max HP, attacker name, attacker AP)
+    FAINTED = 10          # (name,)
+    STATUS_DAMAGE = 11    # (name, status, damage)
+    STATUS_FAINTED = 12   # (name,)
+    TURN_END = 13         # ()
+    WINNER = 14           # (name,)
+
+
+def _move_title(move_name: str) -> str:
+    return move_name.replace('-', ' ').title()
+
+
+def _render_moveset(name: str, moves: Sequence[MoveInfo]) -> List[str]:
+    lines = [f"{name}'s moveset:"]
+    lines.extend(f"  - {move.name.title()} (Power: {move.power}, Type: {move.move_type.capitalize()})" for move in moves)
+    return lines
+
+
+def _render_attack(attacker: str, move_name: str, damage: int, effectiveness: float) -> str:
+    line = f"{attacker} used **{_move_title(move_name)}** and dealt **{damage} damage**."
+    if effectiveness > 1: line += " (Super effective!)"
+    elif effectiveness < 1 and effectiveness > 0: line += " (Not very effective...)"
+    return line
+
+
+_RENDERERS = {
+    LogCode.MOVESET: _render_moveset,
+    LogCode.BATTLE_START: lambda p1, p2: f"**Battle Start: {p1} vs. {p2}!**",
+    LogCode.SEPARATOR: lambda: "-------------------------",
+    LogCode.STARTING_STATUS: lambda name, status: f"_{name} starts the battle with a {status} status!_",
+    LogCode.PLAN: lambda name, strategy: f"**LLM Battle Plan for {name}:** {strategy or 'Fallback: strongest affordable move every turn.'}",
+    LogCode.TURN: lambda turn: f"### --- Turn {turn} ---",
+    LogCode.PARALYZED: lambda name: f"**{name} is paralyzed! It can't move!**",
+    LogCode.STRATEGY: lambda strategy: f"**LLM Strategy:** {strategy}",
+    LogCode.ATTACK: _render_attack,
+    LogCode.HP: lambda defender, hp, max_hp, attacker, ap: f"_{defender}: {hp}/{max_hp} HP | {attacker}: {ap} AP_",
+    LogCode.FAINTED: lambda name: f"**{name} has fainted!**",
+    LogCode.STATUS_DAMAGE: lambda name, status, damage: f"_{name} is hurt by its {status.lower()}! It lost {damage} HP._",
+    LogCode.STATUS_FAINTED: lambda name: f"**{name} has fainted from the status effect!**",
+    LogCode.TURN_END: lambda: "---",
+    LogCode.WINNER: lambda name: f"### The battle is over! The winner is {name}!",
+}
+# Indexed by code; MOVESET is the only multi-line event.
+_RENDERER_TABLE = tuple(_RENDERERS[code] for code in sorted(_RENDERERS))
+
+
+def render_markdown(events: Sequence[tuple]) -> List[str]:
+    """Renders structured log events ((code, *args) tuples) as the markdown battle log lines."""
+    lines: List[str] = []
+    for event in events:
+        code = event[0]
+        if code == LogCode.MOVESET:
+            lines.extend(_render_moveset(*event[1:]))
+        else:
+            lines.append(_RENDERER_TABLE[code](*event[1:]))
+    return lines
+
+
+@dataclass
+class BattleEvent:
+    """What changed in one step of a streamed battle: the log lines added since the previous event."""
+    kind: str  # "start", "turn" or "end"
+    turn: int
+    battle_log: List[str]
+    commentary: List[str]
+    p1_hp: int
+    p2_hp: int
+    winner: Optional[str] = None
+
+
+def _default_strategy(planning: bool) -> "Strategy":
+    # strategies imports this module, so it is only imported once a battle needs a default.
+    from . import strategies
+    return strategies.PlannedLLMStrategy() if planning else strategies.get_strategy("llm")
+
 
 class BattleEngine:
-    def __init__(self, pokemon1_data: PokemonData, pokemon2_data: PokemonData):
+    def __init__(self, pokemon1_data: PokemonData, pokemon2_data: PokemonData, planning: bool = False,
+                 strategy: Optional["Strategy"] = None, seed: Optional[int] = None, summary_only: bool = False):
+        """
+        `strategy` chooses the moves (see app.services.strategies); the default asks the LLM every turn.
+        planning=True is shorthand for a PlannedLLMStrategy: one LLM call plans the battle up front and
+        one more writes the commentary afterwards.
+        All randomness comes from this battle's own generator, so `seed` plus the chosen moves
+        (recorded in `choices`) reproduce the battle exactly; see app.services.replay.
+        The log is kept as structured `events` and rendered to markdown only when `battle_log` is read.
+        summary_only=True records no log or commentary at all, for bulk simulation.
+        """
         self.p1 = BattlePokemon(pokemon1_data)
         self.p2 = BattlePokemon(pokemon2_data)
-        self.battle_log: List[str] = []
+        self.summary_only = summary_only
+        # (LogCode, *args) tuples; see render_markdown.
+        self.events: List[tuple] = []
         self.commentary_log: List[str] = []
         self.turn_count = 0
+        self.seed = (seed if seed is not None else random.randrange(SEED_LIMIT)) % SEED_LIMIT
+        self.rng = random.Random(self.seed)
+        # Index into the attacker's moves for every decision the strategy made, NO_MOVE for a skip.
+        self.choices: List[int] = []
+        self.strategy = strategy or _default_strategy(planning)
+        # (commentary_log index, plain description) for each action awaiting batched commentary.
+        self._pending_commentary: List[Tuple[int, str]] = []
+        # Stats and moves never change, so damage rolls are computed once per matchup and shared between battles.
+        self.p1_damage_table = self._build_damage_table(self.p1, self.p2)
+        self.p2_damage_table = self._build_damage_table(self.p2, self.p1)
+
+    def _build_damage_table(self, attacker: BattlePokemon, defender: BattlePokemon) -> Dict[str, Tuple[int, float]]:
+        """The matchup's damage table, shared by every battle between the same two species."""
+        key = (id(attacker.template), id(defender.template))
+        with _cache_lock:
+            entry = _damage_tables.get(key)
+            if entry is not None and entry[0] is attacker.template and entry[1] is defender.template:
+                _damage_tables.move_to_end(key)
+                return entry[2]
+        table = {move.name: self._calculate_damage(move, attacker, defender) for move in attacker.moves}
+        with _cache_lock:
+            _damage_tables[key] = (attacker.template, defender.template, table)
+            if len(_damage_tables) > TEMPLATE_CACHE_SIZE:
+                _damage_tables.popitem(last=False)
+        return table
+
+    def damage_table(self, attacker: BattlePokemon) -> Dict[str, Tuple[int, float]]:
+        """Precomputed (damage, effectiveness) for each of the attacker's moves against its opponent."""
+        return self.p1_damage_table if attacker is self.p1 else self.p2_damage_table
 
     def _get_move_by_name(self, pokemon: BattlePokemon, move_name: str) -> Optional[MoveInfo]:
-        for move in pokemon.moves:
-            if move.name == move_name:
-                return move
-        return None
+        index = pokemon.move_index.get(move_name)
+        return pokemon.moves[index] if index is not None else None
+
+    def strongest_affordable_move(self, pokemon: BattlePokemon) -> Optional[MoveInfo]:
+        affordable = [move for move in pokemon.moves if (move.power or 0) <= pokemon.attack_points]
+        return max(affordable, key=lambda move: move.power) if affordable else None
+
+    def turn_order(self) -> Tuple[BattlePokemon, BattlePokemon]:
+        """(first, second) mover for every turn: the faster Pokémon, with ties going to pokemon1."""
+        return (self.p1, self.p2) if self.p1.speed >= self.p2.speed else (self.p2, self.p1)
 
     def _calculate_damage(self, move: MoveInfo, attacker: BattlePokemon, defender: BattlePokemon) -> Tuple[int, float]:
         if move.damage_class == 'physical':
@@ -66,95 +324,168 @@ class BattleEngine:
         else:
             return 0, 1.0
         damage = (((2 / 5 + 2) * move.power * attack_stat / defense_stat) / 50) + 2
-        effectiveness = 1.0
-        if move.move_type in TYPE_EFFECTIVENESS:
-            for def_type in defender.types:
-                effectiveness *= TYPE_EFFECTIVENESS[move.move_type].get(def_type, 1)
+        effectiveness = type_effectiveness(type_id(move.move_type), defender.type_ids)
         return int(damage * effectiveness), effectiveness
 
     async def _apply_turn(self, attacker: BattlePokemon, defender: BattlePokemon):
         if attacker.current_hp <= 0: return
+        record = not self.summary_only
 
-        if attacker.status == 'Paralyzed' and random.random() < 0.25:
-            self.battle_log.append(f"**{attacker.name} is paralyzed! It can't move!**")
-            self.commentary_log.append(f"{attacker.name} is fully paralyzed and can't make a move!")
+        if attacker.status == 'Paralyzed' and self.rng.random() < PARALYSIS_SKIP_CHANCE:
+            if record:
+                self.events.append((LogCode.PARALYZED, attacker.name))
+                self.commentary_log.append(f"{attacker.name} is fully paralyzed and can't make a move!")
             return
 
-        llm_response = await llm_client.get_strategic_move_and_commentary(attacker, defender, self.turn_count)
+        llm_response = await self.strategy.choose_move(self, attacker, defender)
         move_name = llm_response.get("chosen_move")
-        self.battle_log.append(f"**LLM Strategy:** {llm_response.get('strategy', 'N/A')}")
-        self.commentary_log.append(llm_response.get('commentary', '...'))
+        if record:
+            self.events.append((LogCode.STRATEGY, llm_response.get('strategy', 'N/A')))
+            self.commentary_log.append(llm_response.get('commentary', '...'))
 
-        if not move_name: return
-        move = self._get_move_by_name(attacker, move_name)
+        move = self._get_move_by_name(attacker, move_name) if move_name else None
+        self.choices.append(attacker.move_index[move.name] if move else NO_MOVE)
+        if record and self.strategy.batch_commentary:
+            self._pending_commentary.append((len(self.commentary_log) - 1, self._describe_action(attacker, defender, move)))
         if not move: return
 
         move_cost = move.power or 0
         attacker.attack_points -= move_cost
-        damage, effectiveness = self._calculate_damage(move, attacker, defender)
+        damage, effectiveness = self.damage_table(attacker)[move.name]
         defender.current_hp = max(0, defender.current_hp - damage)
 
-        log_msg = f"{attacker.name} used **{move.name.replace('-', ' ').title()}** and dealt **{damage} damage**."
-        if effectiveness > 1: log_msg += " (Super effective!)"
-        elif effectiveness < 1 and effectiveness > 0: log_msg += " (Not very effective...)"
+        if record:
+            self.events.append((LogCode.ATTACK, attacker.name, move.name, damage, effectiveness))
+            self.events.append((LogCode.HP, defender.name, defender.current_hp, defender.max_hp, attacker.name, attacker.attack_points))
+            if defender.current_hp <= 0:
+                self.events.append((LogCode.FAINTED, defender.name))
+                self.commentary_log.append(f"And that's it! {defender.name} is down for the count!")
 
-        self.battle_log.append(log_msg)
-        self.battle_log.append(
-            f"_{defender.name}: {defender.current_hp}/{defender.max_hp} HP | {attacker.name}: {attacker.attack_points} AP_"
-        )
+    def _describe_action(self, attacker: BattlePokemon, defender: BattlePokemon, move: Optional[MoveInfo]) -> str:
+        """Plain-text summary of an action, used as input for batched commentary."""
+        if not move:
+            return f"Turn {self.turn_count}: {attacker.name} holds back to save Attack Points."
+        damage, effectiveness = self.damage_table(attacker)[move.name]
+        remaining = max(0, defender.current_hp - damage)
+        text = f"Turn {self.turn_count}: {attacker.name} uses {_move_title(move.name)} on {defender.name} for {damage} damage"
+        if effectiveness > 1: text += " (super effective)"
+        elif 0 < effectiveness < 1: text += " (not very effective)"
+        return text + f", leaving it at {remaining}/{defender.max_hp} HP."
 
-        if defender.current_hp <= 0:
-            self.battle_log.append(f"**{defender.name} has fainted!**")
-            self.commentary_log.append(f"And that's it! {defender.name} is down for the count!")
+    async def _fill_batched_commentary(self):
+        lines = await self.strategy.end_battle(self, [description for _, description in self._pending_commentary])
+        for (index, _), line in zip(self._pending_commentary, lines):
+            self.commentary_log[index] = line
+        self._pending_commentary = []
 
     def _apply_end_of_turn_status_effects(self):
-        for pokemon in [self.p1, self.p2]:
-            if pokemon.current_hp > 0 and pokemon.status in ['Poisoned', 'Burned']:
-                damage = max(1, pokemon.max_hp // 8)
+        for pokemon in (self.p1, self.p2):
+            if pokemon.current_hp > 0 and pokemon.status in DAMAGING_STATUSES:
+                damage = status_damage(pokemon.max_hp)
                 pokemon.current_hp = max(0, pokemon.current_hp - damage)
-                log_msg = f"_{pokemon.name} is hurt by its {pokemon.status.lower()}! It lost {damage} HP._"
-                self.battle_log.append(log_msg)
+                self.log(LogCode.STATUS_DAMAGE, pokemon.name, pokemon.status, damage)
                 if pokemon.current_hp <= 0:
-                    self.battle_log.append(f"**{pokemon.name} has fainted from the status effect!**")
+                    self.log(LogCode.STATUS_FAINTED, pokemon.name)
 
-    async def simulate_battle(self) -> dict:
-        self.battle_log.append(f"**Battle Start: {self.p1.name} vs. {self.p2.name}!**")
-        self.battle_log.append("-------------------------")
-
-        # FEATURE RESTORED: Display movesets at the start
-        self.battle_log.append(f"{self.p1.name}'s moveset:")
-        for move in self.p1.moves:
-            self.battle_log.append(f"  - {move.name.title()} (Power: {move.power}, Type: {move.move_type.capitalize()})")
-        
-        self.battle_log.append(f"{self.p2.name}'s moveset:")
-        for move in self.p2.moves:
-            self.battle_log.append(f"  - {move.name.title()} (Power: {move.power}, Type: {move.move_type.capitalize()})")
-        self.battle_log.append("-------------------------")
-
-        # FEATURE RESTORED: Random starting status
-        if random.random() < 0.3: # 30% chance for a status effect
-            target = random.choice([self.p1, self.p2])
-            target.status = random.choice(['Poisoned', 'Paralyzed', 'Burned'])
-            self.battle_log.append(f"_{target.name} starts the battle with a {target.status} status!_")
-
-        attacker, defender = (self.p1, self.p2) if self.p1.speed >= self.p2.speed else (self.p2, self.p1)
-
-        while self.p1.current_hp > 0 and self.p2.current_hp > 0 and self.turn_count < 50:
-            self.turn_count += 1
-            self.battle_log.append(f"### --- Turn {self.turn_count} ---")
-            
-            attacker.attack_points = min(200, attacker.attack_points + 40)
-            defender.attack_points = min(200, defender.attack_points + 40)
-            
-            await self._apply_turn(attacker, defender)
-            if defender.current_hp <= 0: break
-
-            await self._apply_turn(defender, attacker)
-            if attacker.current_hp <= 0: break
-
-            self._apply_end_of_turn_status_effects()
-            self.battle_log.append("---")
+    def log(self, code: int, *args):
+        """Records a structured log event (nothing is recorded in summary-only mode)."""
+        if not self.summary_only:
+            self.events.append((code, *args))
+
+    @property
+    def battle_log(self) -> List[str]:
+        """The markdown battle log, rendered from `events` on demand."""
+        return render_markdown(self.events)
+
+    def _event(self, kind: str, marks: List[int], winner: Optional[str] = None) -> BattleEvent:
+        """Packs the log events and commentary added since `marks` (updated in place) into an event."""
+        event = BattleEvent(
+            kind=kind, turn=self.turn_count,
+            battle_log=render_markdown(self.events[marks[0]:]), commentary=self.commentary_log[marks[1]:],
+            p1_hp=self.p1.current_hp, p2_hp=self.p2.current_hp, winner=winner,
+        )
+        marks[0], marks[1] = len(self.events), len(self.commentary_log)
+        return event
+
+    async def _play(self) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """Runs the battle, yielding (kind, winner) at the "start", after each "turn" and at the "end"."""
+        self.log(LogCode.BATTLE_START, self.p1.name, self.p2.name)
+        self.log(LogCode.SEPARATOR)
+        self.log(LogCode.MOVESET, self.p1.name, self.p1.moves)
+        self.log(LogCode.MOVESET, self.p2.name, self.p2.moves)
+        self.log(LogCode.SEPARATOR)
+
+        # Random starting status
+        if self.rng.random() < STARTING_STATUS_CHANCE:
+            target = self.rng.choice([self.p1, self.p2])
+            target.status = self.rng.choice(STATUS_EFFECTS)
+            self.log(LogCode.STARTING_STATUS, target.name, target.status)
+
+        await self.strategy.start_battle(self)
+
+        attacker, defender = self.turn_order()
+        yield "start", None
+
+        fainted_mid_turn = False
+        # Summary-only battles are bulk runs (often in worker processes), so turns are not timed.
+        timed = not self.summary_only
+        while self.p1.current_hp > 0 and self.p2.current_hp > 0 and self.turn_count < MAX_TURNS:
+            turn_started = time.perf_counter() if timed else 0.0
+            try:
+                self.turn_count += 1
+                self.log(LogCode.TURN, self.turn_count)
+
+                attacker.attack_points = min(MAX_ATTACK_POINTS, attacker.attack_points + ATTACK_POINT_REGEN)
+                defender.attack_points = min(MAX_ATTACK_POINTS, defender.attack_points + ATTACK_POINT_REGEN)
+
+                await self._apply_turn(attacker, defender)
+                if defender.current_hp <= 0:
+                    fainted_mid_turn = True
+                    break
+
+                await self._apply_turn(defender, attacker)
+                if attacker.current_hp <= 0:
+                    fainted_mid_turn = True
+                    break
+
+                self._apply_end_of_turn_status_effects()
+                self.log(LogCode.TURN_END)
+            finally:
+                if timed:
+                    _turn_seconds.observe(time.perf_counter() - turn_started)
+            yield "turn", None
+
+        if fainted_mid_turn:
+            # The turn that ended the battle broke out of the loop before it was reported.
+            yield "turn", None
+
+        if self.strategy.batch_commentary and not self.summary_only:
+            await self._fill_batched_commentary()
 
         winner = self.p1.name if self.p1.current_hp > 0 else self.p2.name
-        self.battle_log.append(f"### The battle is over! The winner is {winner}!")
-        return {"winner": winner, "battle_log": self.battle_log, "commentary_log": self.commentary_log}
\ No newline at end of file
+        self.log(LogCode.WINNER, winner)
+        yield "end", winner
+
+    async def stream_battle(self) -> AsyncIterator[BattleEvent]:
+        """
+        Runs the battle, yielding a "start" event, one "turn" event per turn as soon as it has been
+        played, and a final "end" event. With batched commentary (planned strategies) the turn events
+        carry placeholder lines and the end event carries the finished commentary log.
+        """
+        marks = [0, 0]
+        async for kind, winner in self._play():
+            if kind == "end" and self.strategy.batch_commentary:
+                marks[1] = 0
+            yield self._event(kind, marks, winner)
+
+    async def simulate_battle(self) -> dict:
+        """
+        Runs the battle to the end. Returns the winner with the rendered battle and commentary logs,
+        or in summary-only mode just the winner, turn count and remaining HP.
+        """
+        winner = None
+        async for _, winner in self._play():
+            pass
+        if self.summary_only:
+            return {"winner": winner, "turns": self.turn_count, "pokemon1_hp": self.p1.current_hp, "pokemon2_hp": self.p2.current_hp}
+        return {"winner": winner, "battle_log": self.battle_log, "commentary_log": self.commentary_log}
@@ -0,0 +1,215 @@
+"""
+In-process queue for battles that run in the background.
+
+`submit` returns a job ID immediately and a fixed set of worker tasks plays the queued battles, so
+an MCP call never waits on the LLM. The queue is bounded: once it is full, or a client already has
+its quota of unfinished jobs, `submit` refuses new work instead of blocking. Finished jobs keep
+their result (or error) for `result_ttl` seconds and are then forgotten.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.environ.get("BATTLE_JOB_WORKERS", "4"))
+DEFAULT_MAX_QUEUED = int(os.environ.get("BATTLE_JOB_MAX_QUEUED", "100"))
+# Unfinished (queued or running) jobs allowed per client.
+DEFAULT_CLIENT_QUOTA = int(os.environ.get("BATTLE_JOB_CLIENT_QUOTA", "10"))
+DEFAULT_RESULT_TTL_SECONDS = float(os.environ.get("BATTLE_JOB_RESULT_TTL", "3600"))
+# Longest a battle_result call may wait for its job to finish.
+MAX_WAIT_SECONDS = float(os.environ.get("BATTLE_JOB_MAX_WAIT", "60"))
+
+_submitted = metrics.counter("battle_jobs_submitted_total", "Battle jobs accepted by submit_battle.")
+_rejected = metrics.counter("battle_jobs_rejected_total", "Battle jobs refused because the queue or the client's quota was full.")
+_failed = metrics.counter("battle_jobs_failed_total", "Battle jobs that ended with an error.")
+_queue_seconds = metrics.histogram("battle_job_queue_seconds", "Time a battle job waited in the queue before a worker took it.")
+_run_seconds = metrics.histogram("battle_job_run_seconds", "Time a worker spent playing one battle job.")
+
+
+class QueueFullError(Exception):
+    """Raised by submit when the queue already holds max_queued jobs."""
+    pass
+
+
+class QuotaExceededError(Exception):
+    """Raised by submit when the client already has client_quota unfinished jobs."""
+    pass
+
+
+class JobNotFoundError(LookupError):
+    """Raised for an unknown job ID, or one whose result has expired."""
+    pass
+
+
+@dataclass
+class BattleJob:
+    id: str
+    client_id: str
+    run: Callable[["BattleJob"], Awaitable[dict]]
+    submitted_at: float
+    status: str = "queued"  # "queued", "running", "done" or "failed"
+    # Updated by `run` as the battle progresses.
+    turn: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def describe(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "turn": self.turn,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class BattleJobQueue:
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED,
+                 client_quota: int = DEFAULT_CLIENT_QUOTA, result_ttl: float = DEFAULT_RESULT_TTL_SECONDS,
+                 clock=time.time):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.client_quota = client_quota
+        self.result_ttl = result_ttl
+        self._clock = clock
+        self._jobs: Dict[str, BattleJob] = {}
+        # Unfinished jobs per client, for the quota.
+        self._active: Dict[str, int] = {}
+        # (expires_at, job_id) in finishing order, which is also expiry order.
+        self._expiry: Deque[Tuple[float, str]] = deque()
+        # Created on first submit, so they belong to the running event loop.
+        self._queue: Optional["asyncio.Queue[BattleJob]"] = None
+        self._tasks: List[asyncio.Task] = []
+        self.rejected = 0
+
+    def submit(self, client_id: str, run: Callable[[BattleJob], Awaitable[dict]]) -> BattleJob:
+        """
+        Queues `await run(job)` and returns the job at once; its return value becomes job.result.
+        Raises QuotaExceededError or QueueFullError rather than waiting for room.
+        """
+        self._expire()
+        if self._queue is None:
+            self._start()
+        if self._active.get(client_id, 0) >= self.client_quota:
+            self.rejected += 1
+            _rejected.inc()
+            raise QuotaExceededError(f"Client already has {self.client_quota} unfinished battle jobs")
+        job = BattleJob(id=uuid.uuid4().hex, client_id=client_id, run=run, submitted_at=self._clock())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            _rejected.inc()
+            raise QueueFullError(f"The battle queue is full ({self.max_queued} jobs waiting); try again later")
+        self._jobs[job.id] = job
+        self._active[client_id] = self._active.get(client_id, 0) + 1
+        _submitted.inc()
+        return job
+
+    def get(self, job_id: str) -> BattleJob:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(f"No battle job '{job_id}' (unknown, or its result expired)")
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> BattleJob:
+        """The job once it has finished, or as it is after `timeout` seconds."""
+        job = self.get(job_id)
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    def _start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stops the workers; jobs that were queued or running are marked failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        for job in self._jobs.values():
+            if not job.finished:
+                self._finish(job, error="The server shut down before the battle finished")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: BattleJob):
+        job.status = "running"
+        job.started_at = self._clock()
+        _queue_seconds.observe(job.started_at - job.submitted_at)
+        started = time.perf_counter()
+        try:
+            result = await job.run(job)
+        except Exception as e:
+            logger.warning(f"Battle job {job.id} failed: {e}")
+            self._finish(job, error=str(e))
+        else:
+            self._finish(job, result=result)
+        finally:
+            _run_seconds.observe(time.perf_counter() - started)
+
+    def _finish(self, job: BattleJob, result: Optional[dict] = None, error: Optional[str] = None):
+        job.status = "failed" if error is not None else "done"
+        job.result = result
+        job.error = error
+        job.finished_at = self._clock()
+        if error is not None:
+            _failed.inc()
+        remaining = self._active.get(job.client_id, 0) - 1
+        if remaining > 0:
+            self._active[job.client_id] = remaining
+        else:
+            self._active.pop(job.client_id, None)
+        self._expiry.append((job.finished_at + self.result_ttl, job.id))
+        job.done.set()
+
+    def _expire(self):
+        now = self._clock()
+        while self._expiry and self._expiry[0][0] <= now:
+            self._jobs.pop(self._expiry.popleft()[1], None)
+
+    def stats(self) -> dict:
+        self._expire()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            **counts,
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "client_quota": self.client_quota,
+            "result_ttl_seconds": self.result_ttl,
+            "rejected": self.rejected,
+        }
+
+
+job_queue = BattleJobQueue()
@@ -1,11 +1,16 @@
 # In app/services/database_client.py
 
 import json
-from typing import List, Optional
+import os
+from typing import Dict, List, Optional
+from sqlalchemy import event, or_, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
 from sqlmodel import Field, Relationship, Session, SQLModel, create_engine, select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from ..models.pydantic_models import PokemonData
 
 # --- Database Models ---
 
@@ -37,6 +42,34 @@ class Move(SQLModel, table=True):
     json_data: str
     pokemons: List["Pokemon"] = Relationship(back_populates="moves", link_model=PokemonMoveLink)
 
+class MoveCatalogEntry(SQLModel, table=True):
+    """Details of every move ever seen on PokéAPI, shared by all Pokémon and used for moveset selection."""
+    __tablename__ = "move_catalog"
+    name: str = Field(primary_key=True)
+    url: str = Field(index=True, unique=True)
+    power: Optional[int] = None
+    move_type: str
+    damage_class: str
+
+class LLMDecision(SQLModel, table=True):
+    """An LLM move choice for a canonical battle state, reused instead of asking the LLM again."""
+    __tablename__ = "llm_decision"
+    state_key: str = Field(primary_key=True)
+    chosen_move: str
+    strategy: str
+    commentary: str
+    last_used_at: float = Field(index=True)
+
+class PokemonSnapshot(SQLModel, table=True):
+    """
+    The fully assembled PokemonData of each stored Pokémon as one JSON document (pydantic-core
+    serialized), written alongside the relational rows so a lookup is one indexed read and one decode.
+    """
+    __tablename__ = "pokemon_snapshot"
+    name: str = Field(primary_key=True)
+    pokedex_id: int = Field(unique=True, index=True)
+    data: bytes
+
 class Stat(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
@@ -59,18 +92,58 @@ class Pokemon(SQLModel, table=True):
 
 
 # --- Database Engine and Setup ---
-DATABASE_URL = "sqlite+aiosqlite:///pokemon.db"
-engine = create_async_engine(DATABASE_URL, echo=False)
+DATABASE_URL = os.environ.get("POKEMON_DATABASE_URL", "sqlite+aiosqlite:///pokemon.db")
+# Readers are concurrent under WAL, so the pool is sized for many simultaneous lookups.
+DB_POOL_SIZE = int(os.environ.get("POKEMON_DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.environ.get("POKEMON_DB_MAX_OVERFLOW", "10"))
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+SQLITE_CACHE_KIB = 64 * 1024
+SQLITE_BUSY_TIMEOUT_MS = 5000
+# Rows per multi-row INSERT, kept well under SQLite's bound-parameter limit.
+SQLITE_INSERT_CHUNK = 500
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers proceed while a writer commits; NORMAL sync is durable enough under WAL."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def create_database_engine(database_url: str) -> AsyncEngine:
+    """Creates an async SQLite engine with the tuned pragmas and pool sizing used by the server."""
+    new_engine = create_async_engine(
+        database_url, echo=False, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=30
+    )
+    event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+engine = create_database_engine(DATABASE_URL)
+_db_initialized = False
 
 async def init_db():
+    """Creates the schema once per process; later calls are no-ops."""
+    global _db_initialized
+    if _db_initialized:
+        return
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+    _db_initialized = True
+
+async def dispose_db():
+    """Closes pooled connections (call on shutdown)."""
+    global _db_initialized
+    await engine.dispose()
+    _db_initialized = False
 
 # --- Database Interaction Functions ---
 async def get_pokemon_from_db(name: str, session: AsyncSession) -> Optional[Pokemon]:
+    """Looks a Pokémon up by name, or by Pokédex ID if `name` is numeric."""
     statement = (
         select(Pokemon)
-        .where(Pokemon.name == name)
+        .where(Pokemon.pokedex_id == int(name) if name.isdigit() else Pokemon.name == name)
         .options(
             selectinload(Pokemon.types),
             selectinload(Pokemon.abilities),
@@ -81,40 +154,153 @@ async def get_pokemon_from_db(name: str, session: AsyncSession) -> Optional[Poke
     result = await session.exec(statement)
     return result.first()
 
-async def add_pokemon_to_db(pokemon_data: dict, session: AsyncSession):
-    types = []
-    for type_name in pokemon_data['types']:
-        result = await session.exec(select(Type).where(Type.name == type_name))
-        type_obj = result.first() or Type(name=type_name)
-        types.append(type_obj)
-    
-    abilities = []
-    for ability_info in pokemon_data['abilities']:
-        ability_name = ability_info['name']
-        result = await session.exec(select(Ability).where(Ability.name == ability_name))
-        ability_obj = result.first() or Ability(name=ability_name)
-        abilities.append(ability_obj)
-    
-    moves = []
-    for move_info in pokemon_data['moves']:
-        move_name = move_info['name']
-        result = await session.exec(select(Move).where(Move.name == move_name))
-        move_obj = result.first()
-        if not move_obj:
-            move_obj = Move(name=move_name, json_data=json.dumps(move_info))
-        moves.append(move_obj)
-    
-    db_pokemon = Pokemon(
-        pokedex_id=pokemon_data['id'],
-        name=pokemon_data['name'],
-        evolution_chain=json.dumps(pokemon_data['evolution']['chain']),
-        types=types,
-        abilities=abilities,
-        moves=moves
+async def get_pokemon_snapshot(name: str, session: AsyncSession) -> Optional[bytes]:
+    """The stored PokemonData JSON of a Pokémon by name, or by Pokédex ID if `name` is numeric."""
+    column = PokemonSnapshot.pokedex_id == int(name) if name.isdigit() else PokemonSnapshot.name == name
+    result = await session.exec(select(PokemonSnapshot.data).where(column))
+    return result.first()
+
+async def get_pokemon_snapshots(names: List[str], session: AsyncSession) -> Dict[str, Optional[bytes]]:
+    """
+    Snapshots of many Pokémon in one IN query over the stored names and Pokédex IDs (numeric
+    entries of `names`). Every stored Pokémon that matched is keyed by both its name and its ID as a
+    string; the value is None if it was stored before snapshots existed. Unknown names are absent.
+    """
+    ids = [int(name) for name in names if name.isdigit()]
+    statement = (
+        select(Pokemon.name, Pokemon.pokedex_id, PokemonSnapshot.data)
+        .outerjoin(PokemonSnapshot, PokemonSnapshot.name == Pokemon.name)
+        .where(or_(Pokemon.name.in_([name for name in names if not name.isdigit()]), Pokemon.pokedex_id.in_(ids)))
+    )
+    found: Dict[str, Optional[bytes]] = {}
+    for name, pokedex_id, data in (await session.exec(statement)).all():
+        found[name] = found[str(pokedex_id)] = data
+    return found
+
+async def save_pokemon_snapshots(pokemon_list: List[PokemonData], session: AsyncSession, commit: bool = True):
+    """Writes (or replaces) the snapshot rows of already stored Pokémon."""
+    rows = [{"name": p.name, "pokedex_id": p.id, "data": p.model_dump_json().encode()} for p in pokemon_list]
+    for chunk in _chunked(rows):
+        statement = sqlite_insert(PokemonSnapshot).values(chunk)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name"], set_={"pokedex_id": statement.excluded.pokedex_id, "data": statement.excluded.data}
+        )
+        await session.exec(statement)
+    if commit:
+        await session.commit()
+
+async def get_all_pokemon_names(session: AsyncSession) -> List[str]:
+    """Names of every stored Pokémon, in Pokédex order."""
+    result = await session.exec(select(Pokemon.name).order_by(Pokemon.pokedex_id))
+    return list(result.all())
+
+async def add_pokemon_to_db(pokemon_data: dict, session: AsyncSession, commit: bool = True):
+    """Stores a single Pokémon. See add_pokemon_batch_to_db."""
+    await add_pokemon_batch_to_db([PokemonData.model_validate(pokemon_data)], session, commit=commit)
+
+def _chunked(rows: List[dict]):
+    for start in range(0, len(rows), SQLITE_INSERT_CHUNK):
+        yield rows[start:start + SQLITE_INSERT_CHUNK]
+
+async def _insert_ignore(model, rows: List[dict], session: AsyncSession):
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING, so rows stored by a concurrent writer are simply skipped."""
+    for chunk in _chunked(rows):
+        await session.exec(sqlite_insert(model).values(chunk).on_conflict_do_nothing())
+
+async def _resolve_ids(model, rows: List[dict], session: AsyncSession) -> Dict[str, int]:
+    """Maps each row's name to its ID in a lookup table, inserting the names that are missing."""
+    if not rows:
+        return {}
+    rows = list({row["name"]: row for row in rows}.values())
+    names = [row["name"] for row in rows]
+    ids = dict((await session.exec(select(model.name, model.id).where(model.name.in_(names)))).all())
+
+    missing = [row for row in rows if row["name"] not in ids]
+    if missing:
+        await _insert_ignore(model, missing, session)
+        missing_names = [row["name"] for row in missing]
+        ids.update((await session.exec(select(model.name, model.id).where(model.name.in_(missing_names)))).all())
+    return ids
+
+async def add_pokemon_batch_to_db(pokemon_list: List[PokemonData], session: AsyncSession, commit: bool = True) -> int:
+    """
+    Stores many Pokémon with set-based writes: one IN lookup per table, INSERT ... ON CONFLICT DO NOTHING
+    for new types, abilities and moves, then the Pokémon rows, their links, stats and snapshots.
+    Pokémon that already exist, or that a concurrent writer stored first, are skipped.
+    Returns the number of Pokémon inserted.
+    """
+    unique: Dict[str, PokemonData] = {}
+    for p in pokemon_list:
+        unique.setdefault(p.name, p)
+    pokemon_list = list(unique.values())
+    if not pokemon_list:
+        return 0
+
+    type_ids = await _resolve_ids(Type, [{"name": t} for p in pokemon_list for t in p.types], session)
+    ability_ids = await _resolve_ids(Ability, [{"name": a.name} for p in pokemon_list for a in p.abilities], session)
+    move_ids = await _resolve_ids(
+        Move, [{"name": m.name, "json_data": json.dumps(m.model_dump())} for p in pokemon_list for m in p.moves], session
     )
-    
-    db_stats = [Stat(name=s['name'], base_stat=s['base_stat'], pokemon=db_pokemon) for s in pokemon_data['base_stats']]
-    
-    session.add(db_pokemon)
-    session.add_all(db_stats)
-    await session.commit()
\ No newline at end of file
+
+    pokemon_rows = [
+        {"pokedex_id": p.id, "name": p.name, "sprite_url": p.sprite_url, "evolution_chain": json.dumps(p.evolution.chain)}
+        for p in pokemon_list
+    ]
+    # RETURNING only yields the rows this call actually inserted, so links are never written twice.
+    pokemon_ids: Dict[str, int] = {}
+    for chunk in _chunked(pokemon_rows):
+        statement = sqlite_insert(Pokemon).values(chunk).on_conflict_do_nothing().returning(Pokemon.name, Pokemon.id)
+        pokemon_ids.update((await session.exec(statement)).all())
+    inserted = [p for p in pokemon_list if p.name in pokemon_ids]
+
+    await _insert_ignore(PokemonTypeLink, [
+        {"pokemon_id": pokemon_ids[p.name], "type_id": type_ids[t]} for p in inserted for t in p.types
+    ], session)
+    await _insert_ignore(PokemonAbilityLink, [
+        {"pokemon_id": pokemon_ids[p.name], "ability_id": ability_ids[a.name]} for p in inserted for a in p.abilities
+    ], session)
+    await _insert_ignore(PokemonMoveLink, [
+        {"pokemon_id": pokemon_ids[p.name], "move_id": move_ids[m.name]} for p in inserted for m in p.moves
+    ], session)
+    await _insert_ignore(Stat, [
+        {"name": s.name, "base_stat": s.base_stat, "pokemon_id": pokemon_ids[p.name]} for p in inserted for s in p.base_stats
+    ], session)
+    await save_pokemon_snapshots(inserted, session, commit=False)
+
+    if commit:
+        await session.commit()
+    return len(inserted)
+
+async def get_catalog_moves(names: List[str], session: AsyncSession) -> Dict[str, MoveCatalogEntry]:
+    if not names:
+        return {}
+    result = await session.exec(select(MoveCatalogEntry).where(MoveCatalogEntry.name.in_(names)))
+    return {entry.name: entry for entry in result.all()}
+
+async def add_catalog_moves(entries: List[dict], session: AsyncSession):
+    """Inserts catalog rows, ignoring moves another writer has already stored."""
+    await _insert_ignore(MoveCatalogEntry, entries, session)
+    await session.commit()
+
+async def get_llm_decision(state_key: str, session: AsyncSession, now: float) -> Optional[LLMDecision]:
+    """Reads a stored decision and marks it as recently used."""
+    decision = await session.get(LLMDecision, state_key)
+    if decision is not None:
+        session.expunge(decision)
+        await session.exec(update(LLMDecision).where(LLMDecision.state_key == state_key).values(last_used_at=now))
+        await session.commit()
+    return decision
+
+async def save_llm_decision(decision: dict, session: AsyncSession):
+    statement = sqlite_insert(LLMDecision).values(decision)
+    statement = statement.on_conflict_do_update(index_elements=["state_key"], set_=decision)
+    await session.exec(statement)
+    await session.commit()
+
+async def trim_llm_decisions(max_rows: int, session: AsyncSession):
+    """Deletes all but the `max_rows` most recently used decisions."""
+    await session.exec(text(
+        "DELETE FROM llm_decision WHERE state_key IN "
+        "(SELECT state_key FROM llm_decision ORDER BY last_used_at DESC LIMIT -1 OFFSET :max_rows)"
+    ).bindparams(max_rows=max_rows))
+    await session.commit()
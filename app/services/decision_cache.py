@@ -0,0 +1,126 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import database_client, metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_MEMORY_ENTRIES = int(os.environ.get("LLM_DECISION_CACHE_SIZE", "4096"))
+MAX_DB_ROWS = int(os.environ.get("LLM_DECISION_CACHE_DB_ROWS", "100000"))
+REGENERATE_COMMENTARY = os.environ.get("LLM_DECISION_CACHE_REGENERATE_COMMENTARY", "0").lower() in ("1", "true", "yes")
+HP_BUCKETS = 10
+AP_BUCKET_SIZE = 20
+# The SQLite tier is trimmed back to MAX_DB_ROWS after this many writes.
+TRIM_EVERY = 500
+
+
+def _hp_bucket(pokemon) -> int:
+    return min(HP_BUCKETS - 1, pokemon.current_hp * HP_BUCKETS // pokemon.max_hp)
+
+
+def state_key(attacker, defender) -> str:
+    """
+    Canonical, quantized battle state for a move decision: species, types, HP bucket, AP bucket and
+    status of both sides plus the set of moves the attacker can afford. The turn number is ignored.
+    """
+    affordable = sorted(m.name for m in attacker.moves if (m.power or 0) <= attacker.attack_points)
+    return "|".join([
+        attacker.name.lower(), ",".join(attacker.types), str(_hp_bucket(attacker)),
+        str(attacker.attack_points // AP_BUCKET_SIZE), attacker.status or "-",
+        defender.name.lower(), ",".join(defender.types), str(_hp_bucket(defender)), defender.status or "-",
+        ",".join(affordable),
+    ])
+
+
+class DecisionCache:
+    """
+    Two-tier cache of LLM move decisions keyed on `state_key`: an in-memory LRU in front of the
+    llm_decision SQLite table. The move choice and strategy are stored apart from the commentary so
+    callers can serve the choice from cache and still regenerate the commentary.
+    """
+
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES, max_db_rows: int = MAX_DB_ROWS,
+                 persist: bool = True, regenerate_commentary: bool = REGENERATE_COMMENTARY):
+        self.max_entries = max_entries
+        self.max_db_rows = max_db_rows
+        self.persist = persist
+        self.regenerate_commentary = regenerate_commentary
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._writes = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, key: str, decision: dict):
+        self._memory[key] = decision
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[dict]:
+        """Returns a copy of the cached decision ({'chosen_move', 'strategy', 'commentary'}) or None."""
+        decision = self._memory.get(key)
+        if decision is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return dict(decision)
+
+        if self.persist:
+            try:
+                async with AsyncSession(database_client.engine) as session:
+                    row = await database_client.get_llm_decision(key, session, time.time())
+            except Exception as e:
+                logger.warning(f"Decision cache read failed: {e}")
+                row = None
+            if row is not None:
+                decision = {"chosen_move": row.chosen_move, "strategy": row.strategy, "commentary": row.commentary}
+                self._remember(key, decision)
+                self.db_hits += 1
+                return dict(decision)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, response: dict):
+        decision = {
+            "chosen_move": response["chosen_move"],
+            "strategy": response.get("strategy", ""),
+            "commentary": response.get("commentary", ""),
+        }
+        self._remember(key, decision)
+        if not self.persist:
+            return
+        try:
+            async with AsyncSession(database_client.engine) as session:
+                await database_client.save_llm_decision({"state_key": key, "last_used_at": time.time(), **decision}, session)
+                self._writes += 1
+                if self._writes % TRIM_EVERY == 0:
+                    await database_client.trim_llm_decisions(self.max_db_rows, session)
+        except Exception as e:
+            logger.warning(f"Decision cache write failed: {e}")
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+        }
+
+
+decision_cache = DecisionCache()
+metrics.registry.collect("llm_decision_cache", decision_cache.stats, counters=("memory_hits", "db_hits", "misses", "evictions"),
+                         help="Cache of LLM move decisions by quantized battle state.")
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+from typing import Dict, Optional
+
+import httpx
+
+from . import metrics, response_cache
+
+logger = logging.getLogger(__name__)
+
+# --- Pool Configuration (overridable through the environment) ---
+MAX_CONCURRENCY = int(os.environ.get("POKEAPI_MAX_CONCURRENCY", "16"))
+MAX_CONNECTIONS = int(os.environ.get("POKEAPI_MAX_CONNECTIONS", "32"))
+REQUEST_TIMEOUT = float(os.environ.get("POKEAPI_TIMEOUT", "10"))
+MAX_RETRIES = int(os.environ.get("POKEAPI_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = float(os.environ.get("POKEAPI_RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = 8.0
+USE_HTTP2 = os.environ.get("POKEAPI_HTTP2", "0").lower() in ("1", "true", "yes")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_request_seconds = metrics.histogram("pokeapi_request_seconds", "One PokéAPI HTTP request, retries included.")
+_retries = metrics.counter("pokeapi_retries_total", "PokéAPI requests retried after a 429/5xx or network error.")
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# Replaces the network transport when set, e.g. an httpx.MockTransport stand-in for PokéAPI.
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("POKEAPI_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1.")
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide pooled client, creating it on first use.
+    Clients are bound to an event loop, so a new one is made if the running loop changed; the
+    previous one is closed on its own loop if that loop is still running.
+    """
+    global _client, _semaphore, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _loop is not loop:
+        if _client is not None and not _client.is_closed:
+            _discard_client(_client, _loop)
+        _client = httpx.AsyncClient(
+            http2=USE_HTTP2 and _http2_available(),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            follow_redirects=True,
+            transport=_transport,
+        )
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        _loop = loop
+    return _client
+
+
+def _discard_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """Closes a client left behind by another event loop. Callers that end a loop should close_client() first."""
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        logger.warning("The event loop of the previous PokéAPI client ended without close_client(); dropping its pool.")
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), RETRY_MAX_DELAY)
+    # Full jitter keeps many throttled requests from retrying in lockstep.
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def get(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """
+    GETs a URL through the shared pool, bounded by the concurrency semaphore.
+    Retries 429/5xx responses and transport errors with jittered backoff, then raises.
+    A 304 answer to conditional `headers` is returned as is.
+    """
+    client = get_client()
+    with _request_seconds.time():
+        return await _get_with_retries(client, url, headers)
+
+
+async def _get_with_retries(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]]) -> httpx.Response:
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            async with _semaphore:
+                response = await client.get(url, headers=headers)
+            if response.status_code == httpx.codes.NOT_MODIFIED:
+                return response
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+                return response
+            if attempt == MAX_RETRIES:
+                response.raise_for_status()
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+        _retries.inc()
+        delay = _retry_delay(attempt, response)
+        logger.warning(f"Retrying {url} in {delay:.2f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+        await asyncio.sleep(delay)
+
+
+async def get_json(url: str) -> dict:
+    """
+    GETs and decodes a JSON document through the on-disk response cache (unless POKEAPI_CACHE=off):
+    fresh entries are served locally, stale ones are revalidated with a conditional request, and in
+    offline mode a URL that was never cached raises response_cache.CacheMissError.
+    """
+    cache = response_cache.get_cache()
+    if cache is None:
+        response = await get(url)
+        return response.json()
+
+    try:
+        cached = await asyncio.to_thread(cache.lookup, url)
+    except sqlite3.Error as e:
+        logger.warning(f"Response cache read failed: {e}")
+        cached = None
+    if cached is not None and cache.is_fresh(cached):
+        cache.hits += 1
+        return json.loads(cached.body)
+    if cache.offline:
+        raise response_cache.CacheMissError(f"{url} is not in the offline PokéAPI cache")
+
+    response = await get(url, headers=cached.validators() if cached is not None else None)
+    if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+        cache.revalidated += 1
+        try:
+            await asyncio.to_thread(cache.touch, url)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+        return json.loads(cached.body)
+
+    cache.misses += 1
+    try:
+        await asyncio.to_thread(cache.store, url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    except sqlite3.Error as e:
+        logger.warning(f"Response cache write failed: {e}")
+    return response.json()
+
+
+async def close_client():
+    """Closes the shared client; the next request opens a fresh pool."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def set_transport(transport: Optional[httpx.AsyncBaseTransport]):
+    """Routes requests through `transport` (None restores the network), e.g. a local PokéAPI stub for benchmarks."""
+    global _transport
+    await close_client()
+    _transport = transport
@@ -1,16 +1,40 @@
 # In app/services/llm_client.py
-import os
 import json
-from groq import Groq
-import random
+import logging
+import time
+
+from . import metrics
+from .decision_cache import decision_cache, state_key
+from .llm_gateway import get_gateway
+
+logger = logging.getLogger(__name__)
+
+_decision_seconds = metrics.histogram("llm_decision_seconds", "One per-turn move decision, decision cache hits included.")
+_decisions = metrics.counter("llm_decisions_total", "Per-turn move decisions requested.")
+_fallbacks = metrics.counter("llm_fallbacks_total", "Per-turn decisions that fell back to the strongest move after an LLM error.")
+
+async def _regenerate_commentary(attacker, defender, decision: dict) -> str:
+    """Asks for fresh commentary on a cached move choice; keeps the cached line if that fails."""
+    prompt = f"""
+    You are a hype Pokémon battle commentator.
+    {attacker.name} (HP: {attacker.current_hp}/{attacker.max_hp}) uses {decision['chosen_move']} against {defender.name} (HP: {defender.current_hp}/{defender.max_hp}).
+    Write a short, exciting, one-sentence commentary. Respond in this exact JSON format: {{"commentary": "..."}}
+    """
+    try:
+        response_text = await get_gateway().complete(prompt, temperature=1.0)
+        return json.loads(response_text)["commentary"]
+    except Exception as e:
+        logger.warning(f"Commentary regeneration failed, keeping the cached line: {e}")
+        return decision["commentary"]
 
 async def get_strategic_move_and_commentary(attacker, defender, turn_count) -> dict:
     """
     Asks the LLM to choose a strategic move and provide separate strategy and commentary.
     """
+    _decisions.inc()
+    started = time.perf_counter()
+    available_moves = []
     try:
-        client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-
         available_moves = [
             {
                 "name": move.name, "power": move.power, "type": move.move_type,
@@ -27,14 +51,17 @@ async def get_strategic_move_and_commentary(attacker, defender, turn_count) -> d
                 "commentary": f"{attacker.name} conserves its energy, waiting for the right moment to strike!"
             }
 
+        key = state_key(attacker, defender)
+        cached = await decision_cache.get(key)
+        if cached is not None:
+            if decision_cache.regenerate_commentary:
+                cached["commentary"] = await _regenerate_commentary(attacker, defender, cached)
+            return cached
+
         # Add effectiveness to help the LLM make better decisions
-        from .battle_engine import TYPE_EFFECTIVENESS
+        from .battle_engine import type_effectiveness, type_id
         for move in available_moves:
-            effectiveness = 1.0
-            if move["type"] in TYPE_EFFECTIVENESS:
-                for def_type in defender.types:
-                    effectiveness *= TYPE_EFFECTIVENESS[move["type"]].get(def_type, 1)
-            move["effectiveness"] = effectiveness
+            move["effectiveness"] = type_effectiveness(type_id(move["type"]), defender.type_ids)
 
 
         prompt = f"""
@@ -59,18 +86,15 @@ async def get_strategic_move_and_commentary(attacker, defender, turn_count) -> d
         }}
         """
 
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile", # Using a more powerful model for better strategy
-            temperature=0.8,
-            response_format={"type": "json_object"},
-        )
-
-        response_text = chat_completion.choices[0].message.content
-        return json.loads(response_text)
+        response_text = await get_gateway().complete(prompt, temperature=0.8)
+        response = json.loads(response_text)
+        if response.get("chosen_move") in {move["name"] for move in available_moves}:
+            await decision_cache.put(key, response)
+        return response
 
     except Exception as e:
-        print(f"LLM Error: {e}") # For debugging
+        logger.warning(f"LLM move decision failed, falling back to the strongest move: {e}")
+        _fallbacks.inc()
         # Failsafe: If LLM fails, pick the highest power move the Pokemon can afford
         if not available_moves: return {"chosen_move": None, "strategy": "Failsafe: No moves available.", "commentary": "Failsafe: Attack failed."}
         
@@ -79,4 +103,95 @@ async def get_strategic_move_and_commentary(attacker, defender, turn_count) -> d
             "chosen_move": best_move['name'],
             "strategy": f"Failsafe: The LLM failed, so {attacker.name} chose its strongest available move: {best_move['name'].replace('-', ' ').title()}.",
             "commentary": f"Under pressure, {attacker.name} unleashes a powerful {best_move['name'].replace('-', ' ').title()}!"
-        }
\ No newline at end of file
+        }
+    finally:
+        _decision_seconds.observe(time.perf_counter() - started)
+
+# Whole-battle planning gets more time than a single-turn decision: one call covers the battle.
+PLAN_TIMEOUT = 60.0
+PLAN_BANDS = {"high_hp": ("high_ap", "low_ap"), "low_hp": ("high_ap", "low_ap")}
+
+
+def _validated_plan(plan: dict, pokemon) -> dict:
+    """Keeps only the plan's known move names; bands missing from the reply are left empty."""
+    known = {move.name for move in pokemon.moves}
+    policy = plan.get("policy") or {}
+    return {
+        "strategy": str(plan.get("strategy", "")),
+        "policy": {
+            hp_band: {ap_band: [name for name in (policy.get(hp_band) or {}).get(ap_band) or [] if name in known] for ap_band in ap_bands}
+            for hp_band, ap_bands in PLAN_BANDS.items()
+        },
+    }
+
+
+async def get_battle_plan(pokemon1, pokemon2) -> dict:
+    """
+    Asks the LLM once for a move policy for both sides of the battle, keyed on HP band and AP band.
+    Returns {"pokemon1": plan, "pokemon2": plan}, or {} if the LLM fails (callers fall back to greedy play).
+    """
+    from .battle_engine import PLAN_AP_THRESHOLD, PLAN_HP_THRESHOLD, type_effectiveness, type_id
+
+    def describe(pokemon, opponent) -> dict:
+        return {
+            "name": pokemon.name, "types": pokemon.types, "hp": pokemon.max_hp, "speed": pokemon.speed,
+            "moves": [
+                {
+                    "name": move.name, "power": move.power, "type": move.move_type, "cost": move.power or 0,
+                    "effectiveness": type_effectiveness(type_id(move.move_type), opponent.type_ids),
+                }
+                for move in pokemon.moves
+            ],
+        }
+
+    prompt = f"""
+    You are a master Pokémon battle strategist planning a whole battle in advance.
+
+    **Rules:** Each Pokémon starts with 200 Attack Points (AP) and regains 40 AP each turn. A move costs AP equal to its power.
+    If no move is affordable, the Pokémon skips its turn to recover AP.
+
+    **Pokémon 1:** {json.dumps(describe(pokemon1, pokemon2))}
+    **Pokémon 2:** {json.dumps(describe(pokemon2, pokemon1))}
+
+    **Your Task:** For each Pokémon, write a policy: for every situation, list its moves in order of preference.
+    The first affordable move listed is used. "high_hp" means HP above {int(PLAN_HP_THRESHOLD * 100)}%, "high_ap" means at least {PLAN_AP_THRESHOLD} AP.
+
+    **Provide your response in this exact JSON format:**
+    {{
+      "pokemon1": {{"strategy": "Brief overall game plan.", "policy": {{"high_hp": {{"high_ap": ["move-name"], "low_ap": ["move-name"]}}, "low_hp": {{"high_ap": ["move-name"], "low_ap": ["move-name"]}}}}}},
+      "pokemon2": {{"strategy": "...", "policy": {{...}}}}
+    }}
+    """
+    try:
+        response_text = await get_gateway().complete(prompt, temperature=0.8, timeout=PLAN_TIMEOUT)
+        response = json.loads(response_text)
+        return {
+            "pokemon1": _validated_plan(response.get("pokemon1") or {}, pokemon1),
+            "pokemon2": _validated_plan(response.get("pokemon2") or {}, pokemon2),
+        }
+    except Exception as e:
+        logger.warning(f"Battle plan request failed, playing without a plan: {e}")
+        return {}
+
+
+async def get_battle_commentary(actions: list) -> list:
+    """
+    Asks the LLM once for one line of commentary per action description, in order.
+    Falls back to the plain descriptions for any lines the LLM did not provide.
+    """
+    if not actions:
+        return []
+    prompt = f"""
+    You are a hype Pokémon battle commentator. Here is every action of a finished battle, in order:
+    {json.dumps(actions, indent=2, ensure_ascii=False)}
+
+    Write a short, exciting, one-sentence commentary for each action, in the same order ({len(actions)} lines).
+    Respond in this exact JSON format: {{"commentary": ["...", "..."]}}
+    """
+    try:
+        response_text = await get_gateway().complete(prompt, temperature=1.0, timeout=PLAN_TIMEOUT)
+        lines = [str(line) for line in json.loads(response_text)["commentary"]][:len(actions)]
+    except Exception as e:
+        logger.warning(f"Battle commentary request failed, using the plain action descriptions: {e}")
+        lines = []
+    return lines + actions[len(lines):]
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Protocol
+
+from groq import AsyncGroq
+
+from . import metrics
+
+DEFAULT_MODEL = os.environ.get("LLM_MODEL", "llama-3.3-70b-versatile")
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+CALL_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "20"))
+
+_call_seconds = metrics.histogram("llm_call_seconds", "One LLM completion through the gateway, queueing included.")
+
+
+@dataclass
+class LLMCompletion:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMBackend(Protocol):
+    async def complete(self, prompt: str, model: str, temperature: float) -> LLMCompletion:
+        """Returns the model's JSON-object reply to a single user prompt."""
+        ...
+
+
+class GroqBackend:
+    """Groq chat completions through one reused AsyncGroq client (re-created if the event loop changes)."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = AsyncGroq(api_key=self.api_key or os.environ.get("GROQ_API_KEY"), max_retries=1)
+            self._loop = loop
+        return self._client
+
+    async def complete(self, prompt: str, model: str, temperature: float) -> LLMCompletion:
+        chat_completion = await self._get_client().chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            temperature=temperature,
+            response_format={"type": "json_object"},
+        )
+        usage = chat_completion.usage
+        return LLMCompletion(
+            text=chat_completion.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+
+def _first_listed_move(prompt: str) -> str:
+    """Default fake reply: picks the first move named in the prompt, like a very naive strategist."""
+    match = re.search(r'"name": "([^"]+)"', prompt)
+    move_name = match.group(1) if match else None
+    return json.dumps({
+        "chosen_move": move_name,
+        "strategy": "Fake backend: first available move.",
+        "commentary": "A decisive move from the fake commentator!",
+    })
+
+
+class FakeBackend:
+    """
+    Local stand-in for tests and benchmarks: no network, optional artificial latency.
+    `responder` maps the prompt to the reply text.
+    """
+
+    def __init__(self, responder: Callable[[str], str] = _first_listed_move, latency: float = 0.0):
+        self.responder = responder
+        self.latency = latency
+        self.last_prompt: Optional[str] = None
+
+    async def complete(self, prompt: str, model: str, temperature: float) -> LLMCompletion:
+        self.last_prompt = prompt
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text = self.responder(prompt)
+        return LLMCompletion(text=text, prompt_tokens=len(prompt) // 4, completion_tokens=len(text) // 4)
+
+
+class LLMGateway:
+    """
+    Async front door for all LLM calls: a global concurrency limit, per-call deadlines and
+    latency/token counters around a pluggable backend.
+    """
+
+    def __init__(self, backend: LLMBackend, max_concurrency: int = MAX_CONCURRENCY, timeout: float = CALL_TIMEOUT):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def _call(self, prompt: str, model: str, temperature: float) -> LLMCompletion:
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                return await self.backend.complete(prompt, model, temperature)
+            finally:
+                self.in_flight -= 1
+
+    async def complete(self, prompt: str, model: str = DEFAULT_MODEL, temperature: float = 0.8,
+                       timeout: Optional[float] = None) -> str:
+        """Returns the completion text. Raises asyncio.TimeoutError past the deadline (queueing included)."""
+        deadline = timeout if timeout is not None else self.timeout
+        started = time.perf_counter()
+        self.calls += 1
+        try:
+            completion = await asyncio.wait_for(self._call(prompt, model, temperature), deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            _call_seconds.observe(latency)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+        self.prompt_tokens += completion.prompt_tokens
+        self.completion_tokens += completion.completion_tokens
+        return completion.text
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "mean_latency_seconds": self.total_latency / self.calls if self.calls else 0.0,
+            "max_latency_seconds": self.max_latency,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway. LLM_BACKEND=fake selects the local fake backend."""
+    global _gateway
+    if _gateway is None:
+        backend = FakeBackend() if os.environ.get("LLM_BACKEND", "groq").lower() == "fake" else GroqBackend()
+        _gateway = LLMGateway(backend)
+    return _gateway
+
+
+def set_gateway(gateway: LLMGateway):
+    """Swaps the process-wide gateway, e.g. for a FakeBackend in tests."""
+    global _gateway
+    _gateway = gateway
+
+
+metrics.registry.collect(
+    "llm_gateway", lambda: _gateway.stats() if _gateway else {},
+    counters=("calls", "errors", "timeouts", "prompt_tokens", "completion_tokens"), help="Raw LLM backend calls.",
+)
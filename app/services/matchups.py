@@ -0,0 +1,262 @@
+"""
+Precomputed all-pairs matchup matrix.
+
+An offline job computes, for every ordered pair of Pokémon stored in the database, the damage of the
+attacker's best usable move (BattleEngine._calculate_damage against the defender's types), the
+number of such attacks needed to KO the defender, and the speed difference. The NxN result is saved
+as a .npy file next to a JSON name index. Queries open it with np.load(mmap_mode="r"), so answering
+"best counters to X" reads two slices of the file and every process shares the OS page cache
+instead of holding its own copy.
+
+The numbers ignore AP, statuses and paralysis; they describe the damage race, not a full battle
+(see monte_carlo for odds).
+
+Usage:
+    python -m app.services.matchups --database pokemon.db --output matchups.npy
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .battle_engine import MAX_ATTACK_POINTS, TYPE_CHART, species_template, type_id
+from .database_client import DATABASE_URL, create_database_engine, get_all_pokemon_names
+from .poke_api_client import load_stored_pokemon, normalize_name
+from ..models.pydantic_models import PokemonData
+
+logger = logging.getLogger(__name__)
+
+MATCHUP_PATH = os.environ.get("POKEMON_MATCHUP_PATH", "matchups.npy")
+MATCHUP_DTYPE = np.dtype([("damage", "<i4"), ("turns_to_ko", "<i4"), ("speed_advantage", "<i4")])
+# turns_to_ko when the attacker has no move that can hurt the defender.
+NO_KO = np.iinfo(np.int32).max
+# Moves per block when computing damage; bounds the (moves x defenders) temporaries.
+MOVE_BLOCK = 1024
+DEFAULT_COUNTERS = 10
+# Tries at opening a matrix and index that belong together while a rebuild replaces them.
+LOAD_ATTEMPTS = 20
+
+# TYPE_CHART with a neutral row and column appended for types outside the chart (type ID -1) and for
+# padding the type list of single-typed Pokémon.
+_PADDED_CHART = np.ones((len(TYPE_CHART) + 1, len(TYPE_CHART) + 1))
+_PADDED_CHART[:-1, :-1] = TYPE_CHART
+_NEUTRAL = len(TYPE_CHART)
+
+
+def index_path(path: str) -> str:
+    """The JSON name index stored next to a matrix file."""
+    return os.path.splitext(path)[0] + ".index.json"
+
+
+def build_matrix(pokemon: Sequence[PokemonData]) -> np.ndarray:
+    """
+    The NxN MATCHUP_DTYPE matrix, where entry [i, j] describes pokemon[i] attacking pokemon[j].
+    Only moves whose power fits in MAX_ATTACK_POINTS count, since the engine can never afford the rest.
+    """
+    templates = [species_template(p) for p in pokemon]
+    count = len(templates)
+    stats = np.array([t.stats for t in templates], dtype=np.float64)
+    hp, attack, defense, special_attack, special_defense, speed = stats.T
+    type_width = max([len(t.type_ids) for t in templates] + [1])
+    defender_types = np.full((count, type_width), _NEUTRAL, dtype=np.int64)
+    for i, t in enumerate(templates):
+        defender_types[i, :len(t.type_ids)] = [_NEUTRAL if tid < 0 else tid for tid in t.type_ids]
+
+    owner, power, special, move_type = [], [], [], []
+    for i, t in enumerate(templates):
+        for move in t.moves:
+            if move.damage_class in ("physical", "special") and move.power <= MAX_ATTACK_POINTS:
+                owner.append(i)
+                power.append(move.power)
+                special.append(move.damage_class == "special")
+                tid = type_id(move.move_type)
+                move_type.append(_NEUTRAL if tid < 0 else tid)
+    owner, power = np.array(owner, dtype=np.int64), np.array(power, dtype=np.float64)
+    special, move_type = np.array(special, dtype=bool), np.array(move_type, dtype=np.int64)
+
+    best = np.zeros((count, count), dtype=np.int64)
+    for start in range(0, len(owner), MOVE_BLOCK):
+        block = slice(start, start + MOVE_BLOCK)
+        block_owner, block_special = owner[block], special[block][:, None]
+        attack_stat = np.where(block_special[:, 0], special_attack[block_owner], attack[block_owner])[:, None]
+        defense_stat = np.where(block_special, special_defense[None, :], defense[None, :])
+        # Same operations in the same order as _calculate_damage, so the results match it exactly.
+        damage = (((2 / 5 + 2) * power[block][:, None] * attack_stat / defense_stat) / 50) + 2
+        effectiveness = np.prod(_PADDED_CHART[move_type[block][:, None, None], defender_types[None, :, :]], axis=2)
+        damage = (damage * effectiveness).astype(np.int64)
+        # Moves are grouped by owner, so each owner's best is a max over one contiguous segment.
+        starts = np.flatnonzero(np.r_[True, block_owner[1:] != block_owner[:-1]])
+        owners = block_owner[starts]
+        best[owners] = np.maximum(best[owners], np.maximum.reduceat(damage, starts, axis=0))
+
+    matrix = np.empty((count, count), dtype=MATCHUP_DTYPE)
+    matrix["damage"] = best
+    with np.errstate(divide="ignore"):
+        turns = np.ceil(hp[None, :] / best)
+    matrix["turns_to_ko"] = np.where(best > 0, turns, NO_KO)
+    matrix["speed_advantage"] = speed[:, None] - speed[None, :]
+    return matrix
+
+
+def save_matrix(matrix: np.ndarray, pokemon: Sequence[PokemonData], path: str = MATCHUP_PATH):
+    """
+    Writes the matrix and its index through temporary files and renames them into place, so
+    processes that have the previous matrix mapped keep reading a complete file. The index records
+    the identity of the matrix file it describes (a rename keeps it), and the matrix is renamed
+    first, so a reader that catches the two renames half done sees the mismatch and retries.
+    """
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    index = {
+        "names": [p.name for p in pokemon],
+        "ids": [p.id for p in pokemon],
+        "created_at": time.time(),
+        "matrix_id": list(_file_id(path + ".tmp")),
+    }
+    with open(index_path(path) + ".tmp", "w") as f:
+        json.dump(index, f)
+    os.replace(path + ".tmp", path)
+    os.replace(index_path(path) + ".tmp", index_path(path))
+
+
+class MatchupMatrix:
+    """Read-only view of a saved matrix, memory-mapped so lookups only touch the pages they need."""
+
+    def __init__(self, path: str = MATCHUP_PATH):
+        self.path = path
+        for _ in range(LOAD_ATTEMPTS):
+            # Identifies the files that were opened; a rebuild replaces both with new ones.
+            self.file_id = _file_id(path) + _file_id(index_path(path))
+            with open(index_path(path)) as f:
+                index = json.load(f)
+            self.matrix = np.load(path, mmap_mode="r")
+            if tuple(index["matrix_id"]) == self.file_id[:2] and _file_id(path) == self.file_id[:2]:
+                break
+            # A rebuild is between its two renames; the index will catch up in a moment.
+            time.sleep(0.05)
+        else:
+            raise RuntimeError(f"{index_path(path)} does not describe {path}; rebuild the matchup matrix")
+        self.names: List[str] = index["names"]
+        self.created_at: float = index["created_at"]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        self._positions.update((str(pokedex_id), i) for i, pokedex_id in enumerate(index["ids"]))
+
+    def position(self, name: str) -> int:
+        """Index of a Pokémon given its name or Pokédex ID."""
+        position = self._positions.get(normalize_name(str(name)))
+        if position is None:
+            raise LookupError(f"'{name}' is not in the matchup matrix (rebuild it after adding Pokémon)")
+        return position
+
+    def _entry(self, attacker: int, defender: int) -> dict:
+        cell = self.matrix[attacker, defender]
+        turns = int(cell["turns_to_ko"])
+        return {"damage": int(cell["damage"]), "turns_to_ko": None if turns == NO_KO else turns}
+
+    def versus(self, name: str, opponent: str) -> dict:
+        """
+        How `name` fares against `opponent`: each side's best-move damage and attacks needed to KO,
+        the speed difference, and who wins the damage race. Equal speed lets `name` move first, as
+        pokemon1 does in BattleEngine.
+        """
+        x, y = self.position(name), self.position(opponent)
+        attack, defence = self._entry(x, y), self._entry(y, x)
+        speed_advantage = int(self.matrix[x, y]["speed_advantage"])
+        x_turns, y_turns = int(self.matrix[x, y]["turns_to_ko"]), int(self.matrix[y, x]["turns_to_ko"])
+        if x_turns == NO_KO and y_turns == NO_KO:
+            winner = None
+        elif x_turns < y_turns or (x_turns == y_turns and speed_advantage >= 0):
+            winner = self.names[x]
+        else:
+            winner = self.names[y]
+        return {
+            "pokemon": self.names[x],
+            "opponent": self.names[y],
+            "damage": attack["damage"],
+            "turns_to_ko": attack["turns_to_ko"],
+            "opponent_damage": defence["damage"],
+            "opponent_turns_to_ko": defence["turns_to_ko"],
+            "speed_advantage": speed_advantage,
+            "predicted_winner": winner,
+        }
+
+    def counters(self, name: str, limit: int = DEFAULT_COUNTERS) -> List[dict]:
+        """
+        The Pokémon that beat `name` most convincingly: those that win its damage race first, ordered
+        by how many attacks they have to spare, then by damage dealt to it.
+        """
+        x = self.position(name)
+        attacks_in = self.matrix[:, x]
+        attacks_out = self.matrix[x, :]
+        their_turns = attacks_in["turns_to_ko"].astype(np.int64)
+        its_turns = attacks_out["turns_to_ko"].astype(np.int64)
+        wins = (their_turns < its_turns) | ((their_turns == its_turns) & (attacks_in["speed_advantage"] >= 0))
+        wins &= their_turns != NO_KO
+        wins[x] = False
+        margin = its_turns - their_turns
+        candidates = np.flatnonzero(wins)
+        order = candidates[np.lexsort((-attacks_in["damage"][candidates], -margin[candidates]))][:limit]
+        return [self.versus(self.names[i], self.names[x]) for i in order]
+
+
+_loaded: Optional[MatchupMatrix] = None
+
+
+def get_matrix(path: str = MATCHUP_PATH) -> MatchupMatrix:
+    """The mapped matrix at `path`, reopened when it has been rebuilt since it was loaded."""
+    global _loaded
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No matchup matrix at {path}; build it with `python -m app.services.matchups`")
+    if _loaded is None or _loaded.path != path or _loaded.file_id != _file_id(path) + _file_id(index_path(path)):
+        _loaded = MatchupMatrix(path)
+    return _loaded
+
+
+def _file_id(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+async def load_all_pokemon(database_url: str = DATABASE_URL) -> List[PokemonData]:
+    """Every stored Pokémon, in Pokédex order."""
+    engine = create_database_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            names = await get_all_pokemon_names(session)
+            return [await load_stored_pokemon(name, session) for name in names]
+    finally:
+        await engine.dispose()
+
+
+async def build(database_url: str = DATABASE_URL, path: str = MATCHUP_PATH) -> int:
+    """Builds and saves the matrix for every Pokémon in `database_url`; returns how many there are."""
+    pokemon = await load_all_pokemon(database_url)
+    if not pokemon:
+        raise ValueError("The database has no Pokémon to build a matchup matrix from")
+    save_matrix(build_matrix(pokemon), pokemon, path)
+    return len(pokemon)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the all-pairs matchup matrix of the Pokémon in the database.")
+    parser.add_argument("--database", default="pokemon.db", help="SQLite file to read (default: pokemon.db).")
+    parser.add_argument("--output", default=MATCHUP_PATH, help=f"Matrix file to write (default: {MATCHUP_PATH}).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    count = asyncio.run(build(f"sqlite+aiosqlite:///{args.database}", args.output))
+    logger.info(f"{count}x{count} matchups written to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Histogram bucket upper bounds in seconds: doubling from 10 µs to about 84 s, plus an overflow bucket.
+DEFAULT_BUCKETS: Tuple[float, ...] = tuple(1e-5 * 2 ** i for i in range(24))
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Counter:
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: observing is one bisect and two additions, and quantiles are estimated
+    by interpolating within the bucket they fall in (good to about a factor of two of the true value).
+    """
+    __slots__ = ("name", "help", "bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, name: str, help: str, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def time(self) -> _Timer:
+        """Context manager that observes the wall time of its block (a timing span)."""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES},
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms for the hot paths. Modules register their metrics
+    once at import time and update them directly, so recording costs a few attribute operations.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        # name -> (help, stats function, keys that are counters)
+        self._collectors: Dict[str, Tuple[str, Callable[[], dict], Tuple[str, ...]]] = {}
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        if name not in self._counters:
+            self._counters[name] = Counter(name, help)
+        return self._counters[name]
+
+    def histogram(self, name: str, help: str = "") -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, help)
+        return self._histograms[name]
+
+    def collect(self, name: str, stats: Callable[[], dict], counters: Sequence[str] = (), help: str = ""):
+        """
+        Exports the numeric values of a component's own stats() dict, read at scrape time, as
+        `{name}_{key}`: the keys in `counters` as counters (with a _total suffix), the rest as gauges.
+        """
+        self._collectors[name] = (help, stats, tuple(counters))
+
+    def snapshot(self) -> dict:
+        """Counter values, and count/sum/mean/p50/p90/p99/max (seconds) per histogram."""
+        return {
+            "counters": {name: counter.value for name, counter in sorted(self._counters.items())},
+            "histograms": {name: histogram.summary() for name, histogram in sorted(self._histograms.items())},
+        }
+
+    def prometheus_text(self, prefix: str = "pokemon_") -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, counter in sorted(self._counters.items()):
+            lines += [f"# HELP {prefix}{name} {counter.help}", f"# TYPE {prefix}{name} counter", f"{prefix}{name} {counter.value}"]
+        for name, histogram in sorted(self._histograms.items()):
+            lines += [f"# HELP {prefix}{name} {histogram.help}", f"# TYPE {prefix}{name} histogram"]
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{prefix}{name}_bucket{{le="{bound:.6g}"}} {cumulative}')
+            lines += [
+                f'{prefix}{name}_bucket{{le="+Inf"}} {histogram.count}',
+                f"{prefix}{name}_sum {histogram.sum}",
+                f"{prefix}{name}_count {histogram.count}",
+            ]
+        for name, (help, stats, counters) in sorted(self._collectors.items()):
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                kind = "counter" if key in counters else "gauge"
+                metric = f"{prefix}{name}_{key}" + ("_total" if kind == "counter" else "")
+                lines += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for counter in self._counters.values():
+            counter.value = 0
+        for histogram in self._histograms.values():
+            histogram.counts = [0] * len(histogram.counts)
+            histogram.count, histogram.sum, histogram.max = 0, 0.0, 0.0
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return registry.counter(name, help)
+
+
+def histogram(name: str, help: str = "") -> Histogram:
+    return registry.histogram(name, help)
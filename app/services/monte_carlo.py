@@ -0,0 +1,128 @@
+import math
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..models.pydantic_models import PokemonData
+from .battle_engine import (
+    ATTACK_POINT_REGEN, DAMAGING_STATUSES, MAX_ATTACK_POINTS, MAX_TURNS, PARALYSIS_SKIP_CHANCE,
+    STARTING_STATUS_CHANCE, STATUS_EFFECTS, BattleEngine, BattlePokemon, status_damage
+)
+
+DEFAULT_BATTLES = 10_000
+MAX_BATTLES = 1_000_000
+
+PARALYZED = STATUS_EFFECTS.index('Paralyzed')
+DAMAGING = [STATUS_EFFECTS.index(s) for s in DAMAGING_STATUSES]
+
+
+def _policy_arrays(engine: BattleEngine, attacker: BattlePokemon) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (cost, damage) arrays for the attacker's moves, strongest first.
+    Mirrors the LLM failsafe: the strongest affordable move is always chosen, ties keep moveset order.
+    """
+    moves = sorted(attacker.moves, key=lambda m: m.power, reverse=True)
+    cost = np.array([m.power or 0 for m in moves], dtype=np.int64)
+    table = engine.damage_table(attacker)
+    damage = np.array([table[m.name][0] for m in moves], dtype=np.int64)
+    return cost, damage
+
+
+def _apply_attacks(rng: np.random.Generator, acting: np.ndarray, status: np.ndarray, ap: np.ndarray,
+                   defender_hp: np.ndarray, cost: np.ndarray, damage: np.ndarray):
+    """Vectorized `BattleEngine._apply_turn` for every battle flagged in `acting`."""
+    paralyzed = acting & (status == PARALYZED)
+    if paralyzed.any():
+        acting = acting & ~(paralyzed & (rng.random(acting.size) < PARALYSIS_SKIP_CHANCE))
+    if cost.size == 0:
+        return
+
+    affordable = cost[None, :] <= ap[:, None]
+    acting = acting & affordable.any(axis=1)
+    choice = affordable.argmax(axis=1)[acting]
+    ap[acting] -= cost[choice]
+    defender_hp[acting] = np.maximum(0, defender_hp[acting] - damage[choice])
+
+
+def _wilson_interval(successes: int, trials: int, confidence: float) -> Tuple[float, float]:
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def simulate_matchup(pokemon1_data: PokemonData, pokemon2_data: PokemonData, battles: int = DEFAULT_BATTLES,
+                     seed: Optional[int] = None, confidence: float = 0.95) -> dict:
+    """
+    Runs `battles` seeded battles between two Pokémon as one NumPy batch and returns win odds.
+
+    Uses the same rules as `BattleEngine.simulate_battle` (random starting status, paralysis skip,
+    burn/poison ticks, AP regen, turn limit and tie-breaks) with the greedy failsafe move policy
+    instead of the LLM, so no network calls are made.
+    """
+    if not 1 <= battles <= MAX_BATTLES:
+        raise ValueError(f"battles must be between 1 and {MAX_BATTLES}")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    engine = BattleEngine(pokemon1_data, pokemon2_data)
+    rng = np.random.default_rng(seed)
+
+    # Index 0 always moves first, exactly like the speed check in simulate_battle.
+    p1_first = engine.p1.speed >= engine.p2.speed
+    sides: List[BattlePokemon] = [engine.p1, engine.p2] if p1_first else [engine.p2, engine.p1]
+    policies = [_policy_arrays(engine, sides[0]), _policy_arrays(engine, sides[1])]
+
+    hp = [np.full(battles, side.max_hp, dtype=np.int64) for side in sides]
+    ap = [np.full(battles, MAX_ATTACK_POINTS, dtype=np.int64) for _ in sides]
+    tick = [status_damage(side.max_hp) for side in sides]
+
+    # Random starting status: 30% of battles, random target, random condition.
+    has_status = rng.random(battles) < STARTING_STATUS_CHANCE
+    target_is_p1 = rng.integers(0, 2, battles) == 0
+    condition = rng.integers(0, len(STATUS_EFFECTS), battles)
+    first_is_target = target_is_p1 if p1_first else ~target_is_p1
+    status = [
+        np.where(has_status & first_is_target, condition, -1),
+        np.where(has_status & ~first_is_target, condition, -1),
+    ]
+    burning = [np.isin(s, DAMAGING) for s in status]
+
+    turns = np.zeros(battles, dtype=np.int64)
+    running = np.ones(battles, dtype=bool)
+    for turn in range(1, MAX_TURNS + 1):
+        running &= (hp[0] > 0) & (hp[1] > 0)
+        if not running.any():
+            break
+        turns[running] = turn
+        for side_ap in ap:
+            side_ap[running] = np.minimum(MAX_ATTACK_POINTS, side_ap[running] + ATTACK_POINT_REGEN)
+
+        _apply_attacks(rng, running, status[0], ap[0], hp[1], *policies[0])
+        _apply_attacks(rng, running & (hp[1] > 0), status[1], ap[1], hp[0], *policies[1])
+
+        survived = running & (hp[0] > 0) & (hp[1] > 0)
+        for side in (0, 1):
+            ticking = survived & burning[side]
+            hp[side][ticking] = np.maximum(0, hp[side][ticking] - tick[side])
+
+    p1_hp = hp[0] if p1_first else hp[1]
+    p1_wins = int(np.count_nonzero(p1_hp > 0))
+    knocked_out = (hp[0] == 0) | (hp[1] == 0)
+    low, high = _wilson_interval(p1_wins, battles, confidence)
+
+    return {
+        "pokemon1": engine.p1.name,
+        "pokemon2": engine.p2.name,
+        "battles": battles,
+        "seed": seed,
+        "pokemon1_win_probability": p1_wins / battles,
+        "pokemon2_win_probability": 1 - p1_wins / battles,
+        "confidence_level": confidence,
+        "pokemon1_win_confidence_interval": [low, high],
+        "mean_turns_to_ko": float(turns[knocked_out].mean()) if knocked_out.any() else None,
+        "turn_limit_rate": float(np.count_nonzero(~knocked_out)) / battles,
+    }
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Dict, List
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import http_client, metrics
+from .database_client import MoveCatalogEntry, add_catalog_moves, get_catalog_moves
+from ..models.pydantic_models import MoveInfo
+
+# In-memory mirror of the move_catalog table. There are only ~900 moves, so it is never evicted.
+_catalog: Dict[str, MoveInfo] = {}
+
+_fanout_seconds = metrics.histogram("move_fanout_seconds", "Concurrent PokéAPI fetch of a Pokémon's never-seen moves.")
+_moves_fetched = metrics.counter("move_fetches_total", "Move details fetched from PokéAPI.")
+_moves_resolved = metrics.counter("move_resolutions_total", "Move references resolved (memory, catalog or PokéAPI).")
+
+
+def _to_move_info(entry: MoveCatalogEntry) -> MoveInfo:
+    return MoveInfo(name=entry.name, power=entry.power, move_type=entry.move_type, damage_class=entry.damage_class)
+
+
+def catalog_row(move_data: dict, url: str) -> dict:
+    """Converts a PokéAPI move payload into a move_catalog row."""
+    return {
+        "name": move_data['name'],
+        "url": url,
+        "power": move_data.get('power'),
+        "move_type": move_data['type']['name'],
+        "damage_class": move_data['damage_class']['name'],
+    }
+
+
+def remember(rows: List[dict]):
+    for row in rows:
+        _catalog[row["name"]] = MoveInfo(
+            name=row["name"], power=row["power"], move_type=row["move_type"], damage_class=row["damage_class"]
+        )
+
+
+async def resolve_moves(move_refs: List[dict], session: AsyncSession) -> List[MoveInfo]:
+    """
+    Returns details for each {'name', 'url'} move reference, in the same order.
+    Looks in memory first, then the SQLite catalog, and only fetches moves that have never been seen.
+    """
+    _moves_resolved.inc(len(move_refs))
+    missing = [ref['name'] for ref in move_refs if ref['name'] not in _catalog]
+    if missing:
+        for name, entry in (await get_catalog_moves(missing, session)).items():
+            _catalog[name] = _to_move_info(entry)
+
+    unseen = [ref for ref in move_refs if ref['name'] not in _catalog]
+    if unseen:
+        _moves_fetched.inc(len(unseen))
+        with _fanout_seconds.time():
+            details = await asyncio.gather(*(http_client.get_json(ref['url']) for ref in unseen))
+        rows = [catalog_row(move_data, ref['url']) for move_data, ref in zip(details, unseen)]
+        await add_catalog_moves(rows, session)
+        remember(rows)
+
+    return [_catalog[ref['name']] for ref in move_refs]
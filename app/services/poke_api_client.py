@@ -1,16 +1,45 @@
 import httpx
 import asyncio
 import json
-from typing import List
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Union
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlmodel import select
+from pydantic import ValidationError
 
 # All model imports now come from the central database_client file
-from .database_client import Pokemon as db_Pokemon, get_pokemon_from_db, add_pokemon_to_db
+from .database_client import (
+    Pokemon as db_Pokemon, get_pokemon_from_db, add_pokemon_batch_to_db, get_pokemon_snapshot, get_pokemon_snapshots,
+    save_pokemon_snapshots,
+)
+from . import http_client, metrics, move_catalog
+from .pokemon_cache import pokemon_cache
 from ..models.pydantic_models import PokemonData, Stat, AbilityInfo, MoveInfo, EvolutionInfo
 
+logger = logging.getLogger(__name__)
+
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
+# Upper bound on names per get_pokemon_details_batch call (each is a bound parameter of its IN query).
+MAX_BATCH_NAMES = int(os.environ.get("POKEMON_BATCH_MAX_NAMES", "200"))
+
+# Fetches in progress, keyed by normalized name, so concurrent misses share one PokéAPI round trip.
+_inflight_fetches: Dict[str, "asyncio.Future[PokemonData]"] = {}
+
+_fetches = metrics.counter("pokeapi_pokemon_fetches_total", "PokéAPI round trips started for a Pokémon.")
+_coalesced = metrics.counter("pokeapi_pokemon_fetches_coalesced_total", "Lookups that joined a PokéAPI fetch already in flight instead of starting one.")
+_memory_hits = metrics.counter("lookup_memory_hits_total", "get_pokemon_details calls served from the in-process cache.")
+_db_hits = metrics.counter("lookup_db_hits_total", "get_pokemon_details calls served from SQLite.")
+_db_misses = metrics.counter("lookup_db_misses_total", "get_pokemon_details calls that went to PokéAPI.")
+_db_lookup_seconds = metrics.histogram("lookup_db_seconds", "SQLite lookup and decode of one Pokémon, hit or miss.")
+_batch_db_seconds = metrics.histogram("lookup_batch_db_seconds", "SQLite lookup and decode of one get_pokemon_details_batch call.")
+_convert_seconds = metrics.histogram("lookup_convert_seconds", "Assembling PokemonData from the relational rows (no usable snapshot).")
+_api_fetch_seconds = metrics.histogram("lookup_api_fetch_seconds", "PokéAPI fetch, move resolution and store of one Pokémon.")
+_moveset_seconds = metrics.histogram("moveset_resolve_seconds", "Resolving a Pokémon's learnable moves (catalog plus PokéAPI fan-out).")
+
+def normalize_name(name: str) -> str:
+    """The form names and Pokédex IDs are stored and cached under."""
+    return name.lower().strip()
 
 class PokemonNotFoundError(Exception):
     """Raised when a Pokémon is not found in the PokéAPI."""
@@ -25,56 +54,175 @@ def _convert_db_pokemon_to_pydantic(db_pokemon: db_Pokemon) -> PokemonData:
         types=[t.name for t in db_pokemon.types],
         base_stats=[Stat(name=s.name, base_stat=s.base_stat) for s in db_pokemon.base_stats],
         abilities=[AbilityInfo(name=a.name, is_hidden=False) for a in db_pokemon.abilities],
-        moves=[MoveInfo.parse_obj(json.loads(m.json_data)) for m in db_pokemon.moves],
+        moves=[MoveInfo.model_validate_json(m.json_data) for m in db_pokemon.moves],
         evolution=EvolutionInfo(chain=json.loads(db_pokemon.evolution_chain))
     )
 
+async def load_stored_pokemon(name: str, session: AsyncSession) -> Optional[PokemonData]:
+    """
+    Reads a stored Pokémon from its snapshot row: one primary-key read and one JSON decode. Pokémon
+    stored before snapshots existed, or whose snapshot no longer validates against PokemonData, are
+    assembled from the relational tables instead and their snapshot is rewritten.
+    """
+    snapshot = await get_pokemon_snapshot(name, session)
+    if snapshot is not None:
+        try:
+            return PokemonData.model_validate_json(snapshot)
+        except ValidationError as e:
+            logger.warning(f"Stale snapshot for '{name}' ({e.error_count()} validation errors); rebuilding it.")
+
+    db_pokemon = await get_pokemon_from_db(name, session)
+    if db_pokemon is None:
+        return None
+    with _convert_seconds.time():
+        pydantic_pokemon = _convert_db_pokemon_to_pydantic(db_pokemon)
+    await save_pokemon_snapshots([pydantic_pokemon], session)
+    return pydantic_pokemon
+
 async def get_pokemon_details(pokemon_name: str, session: AsyncSession) -> PokemonData:
     """Fetches comprehensive data for a Pokémon, utilizing the SQLite database."""
-    normalized_name = pokemon_name.lower()
-    
-    db_pokemon = await get_pokemon_from_db(normalized_name, session)
-    if db_pokemon:
-        print(f"DB HIT: Found '{normalized_name}' in the database.")
-        return _convert_db_pokemon_to_pydantic(db_pokemon)
+    normalized_name = normalize_name(pokemon_name)
 
-    print(f"DB MISS: '{normalized_name}' not in database. Fetching from PokéAPI...")
-    async with httpx.AsyncClient() as client:
-        try:
-            pokemon_response = await client.get(f"{POKEAPI_BASE_URL}/pokemon/{normalized_name}")
-            pokemon_response.raise_for_status()
-            pokemon_data = pokemon_response.json()
-
-            species_url = pokemon_data['species']['url']
-            species_response = await client.get(species_url)
-            species_response.raise_for_status()
-            species_data = species_response.json()
-
-            evolution_chain_url = species_data['evolution_chain']['url']
-            evolution_response = await client.get(evolution_chain_url)
-            evolution_response.raise_for_status()
-            evolution_data = evolution_response.json()
-
-            pydantic_pokemon = await _parse_pydantic_pokemon(pokemon_data, evolution_data, client)
-            
-            print(f"Adding '{normalized_name}' to the database for future requests.")
-            await add_pokemon_to_db(pydantic_pokemon.dict(), session)
-            
-            return pydantic_pokemon
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise PokemonNotFoundError(f"Pokémon '{pokemon_name}' not found.")
-            else:
-                raise Exception(f"Error fetching data from PokéAPI: {e.response.text}")
-
-async def _parse_pydantic_pokemon(pokemon_data: dict, evolution_data: dict, client: httpx.AsyncClient) -> PokemonData:
-    """Parses raw API data into our Pydantic PokemonData model."""
+    cached = pokemon_cache.get(int(normalized_name) if normalized_name.isdigit() else normalized_name)
+    if cached is not None:
+        _memory_hits.inc()
+        return cached
+
+    with _db_lookup_seconds.time():
+        pydantic_pokemon = await load_stored_pokemon(normalized_name, session)
+    if pydantic_pokemon:
+        _db_hits.inc()
+        logger.debug(f"DB HIT: Found '{normalized_name}' in the database.")
+        pokemon_cache.put(pydantic_pokemon)
+        return pydantic_pokemon
+
+    _db_misses.inc()
+    logger.debug(f"DB MISS: '{normalized_name}' not in database. Fetching from PokéAPI...")
+    # End the read transaction so this caller's pooled connection is free while it waits.
+    await session.commit()
+    return await _fetch_coalesced(pokemon_name, normalized_name, session.bind)
+
+async def _fetch_coalesced(pokemon_name: str, normalized_name: str, bind) -> PokemonData:
+    """Joins the PokéAPI fetch already in flight for this name, or starts one."""
+    fetch = _inflight_fetches.get(normalized_name)
+    if fetch is None:
+        fetch = asyncio.ensure_future(_fetch_and_store(pokemon_name, normalized_name, bind))
+        _inflight_fetches[normalized_name] = fetch
+        fetch.add_done_callback(lambda done: _fetch_finished(normalized_name, done))
+        _fetches.inc()
+    else:
+        _coalesced.inc()
+    # Shielded so a cancelled caller doesn't cancel the fetch other callers are waiting on.
+    return await asyncio.shield(fetch)
+
+def _fetch_finished(normalized_name: str, fetch: "asyncio.Future[PokemonData]"):
+    _inflight_fetches.pop(normalized_name, None)
+    # Marks a failure as retrieved: if every caller was cancelled, no one else will look at it.
+    if not fetch.cancelled():
+        fetch.exception()
+
+async def get_pokemon_details_batch(names: List[str], session: AsyncSession,
+                                    return_exceptions: bool = True) -> List[Union[PokemonData, Exception]]:
+    """
+    Looks up many Pokémon at once, in the order of `names` (names or Pokédex IDs; repeats allowed).
+    The in-process cache is checked first, everything else is read with one IN query, and whatever
+    is still missing is fetched from PokéAPI concurrently. With return_exceptions, a name that fails
+    comes back as its exception (PokemonNotFoundError if PokéAPI doesn't know it); otherwise the
+    first failure is raised, as with asyncio.gather.
+    """
+    if len(names) > MAX_BATCH_NAMES:
+        raise ValueError(f"At most {MAX_BATCH_NAMES} names per batch (got {len(names)})")
+    requested = {}
+    for name in names:
+        requested.setdefault(normalize_name(name), name)
+
+    found: Dict[str, Union[PokemonData, Exception]] = {}
+    for key in requested:
+        cached = pokemon_cache.get(int(key) if key.isdigit() else key)
+        if cached is not None:
+            _memory_hits.inc()
+            found[key] = cached
+
+    misses = []
+    pending = [key for key in requested if key not in found]
+    if pending:
+        with _batch_db_seconds.time():
+            snapshots = await get_pokemon_snapshots(pending, session)
+            for key in pending:
+                if key not in snapshots:
+                    misses.append(key)
+                    continue
+                stored = None
+                if snapshots[key] is not None:
+                    try:
+                        stored = PokemonData.model_validate_json(snapshots[key])
+                    except ValidationError:
+                        pass
+                if stored is None:
+                    # Stored without a usable snapshot: the single-name path rebuilds it.
+                    stored = await load_stored_pokemon(key, session)
+                _db_hits.inc()
+                pokemon_cache.put(stored)
+                found[key] = stored
+
+    logger.debug(f"Batch of {len(requested)} names: {len(requested) - len(pending)} in memory, "
+                 f"{len(pending) - len(misses)} from the database, {len(misses)} fetching from PokéAPI.")
+    if misses:
+        _db_misses.inc(len(misses))
+        await session.commit()
+        fetched = await asyncio.gather(
+            *(_fetch_coalesced(requested[key], key, session.bind) for key in misses), return_exceptions=True
+        )
+        found.update(zip(misses, fetched))
+
+    results = [found[normalize_name(name)] for name in names]
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+def get_fetch_stats() -> dict:
+    return {"fetches": _fetches.value, "coalesced": _coalesced.value, "in_flight": len(_inflight_fetches)}
+
+async def _fetch_and_store(pokemon_name: str, normalized_name: str, bind) -> PokemonData:
+    """Fetches a Pokémon from PokéAPI and stores it. Runs once per name no matter how many callers wait on it."""
+    started = time.perf_counter()
+    try:
+        pokemon_data = await http_client.get_json(f"{POKEAPI_BASE_URL}/pokemon/{normalized_name}")
+        species_data = await http_client.get_json(pokemon_data['species']['url'])
+        evolution_data = await http_client.get_json(species_data['evolution_chain']['url'])
+
+        # The shared fetch gets its own session; callers' sessions can't be used concurrently.
+        async with AsyncSession(bind) as session:
+            with _moveset_seconds.time():
+                move_pool = await move_catalog.resolve_moves([m['move'] for m in pokemon_data['moves']], session)
+            pydantic_pokemon = _parse_pydantic_pokemon(pokemon_data, evolution_data, move_pool)
+
+            logger.debug(f"Adding '{normalized_name}' to the database for future requests.")
+            await add_pokemon_batch_to_db([pydantic_pokemon], session)
+
+        pokemon_cache.put(pydantic_pokemon)
+        return pydantic_pokemon
+
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise PokemonNotFoundError(f"Pokémon '{pokemon_name}' not found.")
+        else:
+            raise Exception(f"Error fetching data from PokéAPI: {e.response.text}")
+    finally:
+        _api_fetch_seconds.observe(time.perf_counter() - started)
+
+def _parse_pydantic_pokemon(pokemon_data: dict, evolution_data: dict, move_pool: List[MoveInfo]) -> PokemonData:
+    """
+    Parses raw API data into our Pydantic PokemonData model.
+    `move_pool` holds the details of every learnable move, in the order listed by the API.
+    """
     stats = [Stat(name=s['stat']['name'], base_stat=s['base_stat']) for s in pokemon_data['stats']]
     abilities = [AbilityInfo(name=a['ability']['name'], is_hidden=a['is_hidden']) for a in pokemon_data['abilities']]
     types = [t['type']['name'] for t in pokemon_data['types']]
     sprite_url = pokemon_data.get('sprites', {}).get('front_default')
-    moves = await _select_competitive_moveset(pokemon_data['moves'], types, client)
+    moves = _select_competitive_moveset(move_pool, types)
     
     chain = []
     current = evolution_data['chain']
@@ -92,21 +240,9 @@ async def _parse_pydantic_pokemon(pokemon_data: dict, evolution_data: dict, clie
         evolution=evolution_info
     )
 
-async def _select_competitive_moveset(all_moves_data: List[dict], pokemon_types: List[str], client: httpx.AsyncClient) -> List[MoveInfo]:
+def _select_competitive_moveset(move_pool: List[MoveInfo], pokemon_types: List[str]) -> List[MoveInfo]:
     """Analyzes a move pool and selects a competitive set of four moves."""
-    move_urls = [move_info['move']['url'] for move_info in all_moves_data]
-    move_tasks = [client.get(url) for url in move_urls]
-    move_responses = await asyncio.gather(*move_tasks, return_exceptions=True)
-
-    processed_moves = []
-    for res in move_responses:
-        if isinstance(res, httpx.Response) and res.status_code == 200:
-            move_data = res.json()
-            if move_data.get('power') is not None and move_data['power'] > 0:
-                processed_moves.append(MoveInfo(
-                    name=move_data['name'], power=move_data.get('power'),
-                    move_type=move_data['type']['name'], damage_class=move_data['damage_class']['name']
-                ))
+    processed_moves = [m for m in move_pool if m.power is not None and m.power > 0]
 
     if not processed_moves: return []
 
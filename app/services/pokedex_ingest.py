@@ -0,0 +1,150 @@
+"""
+Offline bulk ingest of the whole Pokédex into pokemon.db from a local PokéAPI data dump.
+
+The dump uses the layout of the PokeAPI/api-data repository, i.e. <data_dir>/pokemon/1/index.json,
+<data_dir>/pokemon-species/1/index.json, <data_dir>/evolution-chain/1/index.json and
+<data_dir>/move/1/index.json. No network requests are made.
+
+Usage:
+    python -m app.services.pokedex_ingest path/to/api-data/data/api/v2 [--database pokemon.db]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database_client import add_catalog_moves, add_pokemon_batch_to_db, create_database_engine
+from .move_catalog import catalog_row
+from .poke_api_client import POKEAPI_BASE_URL, _parse_pydantic_pokemon
+from ..models.pydantic_models import MoveInfo, PokemonData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50
+
+# Per-worker state, set by the pool initializer.
+_data_dir: Optional[Path] = None
+_moves: Dict[str, MoveInfo] = {}
+
+
+def _resource_files(data_dir: Path, resource: str) -> List[Path]:
+    """Lists <resource>/<id>/index.json files ordered by numeric ID, so ingest order is reproducible."""
+    files = [p for p in (data_dir / resource).glob("*/index.json") if p.parent.name.isdigit()]
+    return sorted(files, key=lambda p: int(p.parent.name))
+
+
+def _load_url(url: str) -> dict:
+    """Reads the dump file behind an API URL such as '/api/v2/pokemon-species/1/'."""
+    relative = url.split("/api/v2/", 1)[-1].strip("/")
+    with open(_data_dir / relative / "index.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _chunks(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _init_worker(data_dir: str, move_rows: List[dict]):
+    global _data_dir, _moves
+    _data_dir = Path(data_dir)
+    _moves = {
+        row["name"]: MoveInfo(name=row["name"], power=row["power"], move_type=row["move_type"], damage_class=row["damage_class"])
+        for row in move_rows
+    }
+
+
+def _parse_move_chunk(paths: List[str]) -> List[dict]:
+    rows = []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                move_data = json.load(f)
+            rows.append(catalog_row(move_data, f"{POKEAPI_BASE_URL}/move/{move_data['id']}/"))
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipped move file {path}: {e!r}")
+    return rows
+
+
+def _parse_pokemon_chunk(paths: List[str]) -> Tuple[List[PokemonData], List[str]]:
+    """Parses a chunk of Pokémon files, returning (pokemon, errors)."""
+    parsed, errors = [], []
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                pokemon_data = json.load(f)
+            species_data = _load_url(pokemon_data['species']['url'])
+            if species_data.get('evolution_chain'):
+                evolution_data = _load_url(species_data['evolution_chain']['url'])
+            else:
+                evolution_data = {"chain": {"species": {"name": species_data['name']}, "evolves_to": []}}
+
+            move_pool = [_moves[m['move']['name']] for m in pokemon_data['moves'] if m['move']['name'] in _moves]
+            parsed.append(_parse_pydantic_pokemon(pokemon_data, evolution_data, move_pool))
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            errors.append(f"{path}: {e!r}")
+    return parsed, errors
+
+
+async def ingest(data_dir: str, database_url: str, workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Builds (or tops up) a Pokémon database from a local dump. Existing Pokémon are left untouched."""
+    root = Path(data_dir)
+    move_files = [str(p) for p in _resource_files(root, "move")]
+    pokemon_files = [str(p) for p in _resource_files(root, "pokemon")]
+    if not pokemon_files:
+        raise FileNotFoundError(f"No pokemon/<id>/index.json files found under {root}")
+
+    engine = create_database_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            move_rows = [row for rows in pool.map(_parse_move_chunk, _chunks(move_files, chunk_size * 4)) for row in rows]
+        async with AsyncSession(engine) as session:
+            await add_catalog_moves(move_rows, session)
+
+        added, errors = 0, []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(root), move_rows)) as pool:
+            # Results are consumed in submission order so row IDs are identical between runs.
+            futures = [loop.run_in_executor(pool, _parse_pokemon_chunk, chunk) for chunk in _chunks(pokemon_files, chunk_size)]
+            for future in futures:
+                parsed, chunk_errors = await future
+                errors.extend(chunk_errors)
+                async with AsyncSession(engine) as session:
+                    added += await add_pokemon_batch_to_db(parsed, session)
+    finally:
+        await engine.dispose()
+    return {"moves": len(move_rows), "pokemon_added": added, "pokemon_files": len(pokemon_files), "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill pokemon.db from a local PokéAPI data dump, without network access.")
+    parser.add_argument("data_dir", help="Directory containing pokemon/, pokemon-species/, evolution-chain/ and move/.")
+    parser.add_argument("--database", default="pokemon.db", help="SQLite file to create or top up (default: pokemon.db).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parser processes (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Pokémon per worker task and transaction.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    summary = asyncio.run(ingest(args.data_dir, f"sqlite+aiosqlite:///{args.database}", args.workers, args.chunk_size))
+    for error in summary["errors"]:
+        logger.warning(f"Skipped {error}")
+    logger.info(
+        f"Ingested {summary['pokemon_added']} new Pokémon ({summary['pokemon_files']} files) and "
+        f"{summary['moves']} moves into {args.database} in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+from . import metrics
+from ..models.pydantic_models import PokemonData
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("POKEMON_CACHE_MAX_ENTRIES", "1024"))
+DEFAULT_MAX_BYTES = int(os.environ.get("POKEMON_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = float(os.environ.get("POKEMON_CACHE_TTL", "3600"))
+
+
+class PokemonCache:
+    """
+    Bounded in-process LRU cache of PokemonData above SQLite, keyed by normalized name and Pokédex ID.
+
+    Entries expire after `ttl_seconds`, and the least recently used entries are evicted once either
+    `max_entries` or the approximate `max_bytes` budget (serialized JSON size) is exceeded.
+    Cached objects are frozen models shared between callers.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # name -> (pokemon, expires_at, size_in_bytes)
+        self._entries: "OrderedDict[str, Tuple[PokemonData, float, int]]" = OrderedDict()
+        self._names_by_id: Dict[int, str] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Union[str, int]) -> Optional[PokemonData]:
+        entry = self._entries.get(key)
+        if entry is None:
+            # Not a cached name; try it as a Pokédex ID.
+            key = self._names_by_id.get(key)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+        if entry[1] <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, pokemon: PokemonData):
+        size = len(pokemon.model_dump_json())
+        if size > self.max_bytes:
+            return
+        if pokemon.name in self._entries:
+            self._remove(pokemon.name)
+        self._entries[pokemon.name] = (pokemon, self._clock() + self.ttl_seconds, size)
+        self._names_by_id[pokemon.id] = pokemon.name
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, key: Union[str, int]):
+        name = self._names_by_id.get(key) if isinstance(key, int) else key
+        if name in self._entries:
+            self._remove(name)
+
+    def clear(self):
+        self._entries.clear()
+        self._names_by_id.clear()
+        self._bytes = 0
+
+    def _remove(self, name: str):
+        pokemon, _, size = self._entries.pop(name)
+        self._names_by_id.pop(pokemon.id, None)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+pokemon_cache = PokemonCache()
+metrics.registry.collect("memory_cache", pokemon_cache.stats, counters=("hits", "misses", "evictions", "expirations"),
+                         help="In-process PokemonData cache.")
@@ -0,0 +1,85 @@
+"""
+Compact, deterministic battle replays.
+
+A battle is fully determined by its RNG seed, the two Pokémon and the moves that were chosen, so a
+replay stores just those: a 14-byte header (magic, seed, both Pokédex IDs, number of decisions)
+followed by one 4-bit move index per decision. A typical battle fits in a few dozen bytes, and
+`replay_battle` re-derives its full battle log locally, without calling the LLM.
+"""
+import struct
+from dataclasses import dataclass
+from typing import List
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import poke_api_client
+from .battle_engine import NO_MOVE, BattleEngine
+from .strategies import Strategy
+
+MAGIC = b"PKR1"
+HEADER = struct.Struct("<4sIHHH")
+# Move indices are packed two per byte; this nibble marks a skipped turn.
+SKIP_NIBBLE = 0xF
+
+
+@dataclass(frozen=True)
+class Replay:
+    seed: int
+    pokemon1_id: int
+    pokemon2_id: int
+    choices: List[int]
+
+
+def from_engine(engine: BattleEngine) -> Replay:
+    return Replay(seed=engine.seed, pokemon1_id=engine.p1.id, pokemon2_id=engine.p2.id, choices=list(engine.choices))
+
+
+def encode(replay: Replay) -> bytes:
+    if any(choice != NO_MOVE and not 0 <= choice < SKIP_NIBBLE for choice in replay.choices):
+        raise ValueError("Replays support at most 15 moves per Pokémon")
+    nibbles = [SKIP_NIBBLE if choice == NO_MOVE else choice for choice in replay.choices]
+    if len(nibbles) % 2:
+        nibbles.append(SKIP_NIBBLE)
+    body = bytes(nibbles[i] << 4 | nibbles[i + 1] for i in range(0, len(nibbles), 2))
+    return HEADER.pack(MAGIC, replay.seed, replay.pokemon1_id, replay.pokemon2_id, len(replay.choices)) + body
+
+
+def decode(data: bytes) -> Replay:
+    if len(data) < HEADER.size:
+        raise ValueError("Replay is truncated")
+    magic, seed, pokemon1_id, pokemon2_id, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a battle replay (bad magic bytes)")
+    body = data[HEADER.size:]
+    if len(body) != (count + 1) // 2:
+        raise ValueError("Replay is truncated")
+    nibbles = [nibble for byte in body for nibble in (byte >> 4, byte & 0xF)][:count]
+    choices = [NO_MOVE if nibble == SKIP_NIBBLE else nibble for nibble in nibbles]
+    return Replay(seed=seed, pokemon1_id=pokemon1_id, pokemon2_id=pokemon2_id, choices=choices)
+
+
+class ReplayStrategy(Strategy):
+    """Plays back recorded move indices in order; skips once they run out."""
+    name = "replay"
+
+    def __init__(self, choices: List[int]):
+        self._choices = iter(choices)
+
+    async def choose_move(self, engine, attacker, defender) -> dict:
+        index = next(self._choices, NO_MOVE)
+        if index == NO_MOVE or index >= len(attacker.moves):
+            return {"chosen_move": None, "strategy": f"Replay: {attacker.name} skips its turn.", "commentary": ""}
+        move_name = attacker.moves[index].name
+        return {"chosen_move": move_name, "strategy": f"Replay: {move_name.replace('-', ' ').title()}", "commentary": ""}
+
+
+async def replay_battle(data: bytes, session: AsyncSession) -> dict:
+    """
+    Re-runs a recorded battle from its replay bytes and returns the same result shape as
+    BattleEngine.simulate_battle. The strategy and commentary text is not part of a replay.
+    """
+    replay = decode(data)
+    pokemon1_data = await poke_api_client.get_pokemon_details(str(replay.pokemon1_id), session)
+    pokemon2_data = await poke_api_client.get_pokemon_details(str(replay.pokemon2_id), session)
+    engine = BattleEngine(pokemon1_data, pokemon2_data, strategy=ReplayStrategy(replay.choices), seed=replay.seed)
+    return await engine.simulate_battle()
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# "on" caches and revalidates, "offline" serves only from the cache (never the network), "off" disables it.
+CACHE_MODE = os.environ.get("POKEAPI_CACHE", "on").lower()
+CACHE_PATH = os.environ.get("POKEAPI_CACHE_PATH", "pokeapi_cache.db")
+MAX_BYTES = int(os.environ.get("POKEAPI_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# PokéAPI data is close to static, so cached responses are served without revalidation for this long.
+MAX_AGE_SECONDS = float(os.environ.get("POKEAPI_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+COMPRESSION_LEVEL = 6
+# Eviction trims the store to this fraction of MAX_BYTES so it doesn't run on every write.
+EVICT_TO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT,
+    fetched_at REAL NOT NULL, last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at);
+"""
+
+
+class CacheMissError(LookupError):
+    """Raised in offline mode for a URL that has never been cached."""
+    pass
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers, so an unchanged resource comes back as a bodyless 304."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of raw PokéAPI response bodies in its own SQLite file, kept apart from
+    pokemon.db so rebuilding the database or changing how movesets are derived never refetches.
+
+    Each URL points at the SHA-256 digest of its body, and bodies are stored once per digest,
+    zlib-compressed. ETag/Last-Modified are kept for revalidation. Once the compressed bodies exceed
+    `max_bytes`, the least recently used URLs are evicted. The methods block on SQLite, so
+    http_client.get_json calls them through asyncio.to_thread.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE_SECONDS,
+                 offline: bool = False, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        # Updated by http_client.get_json, which knows how each request was served.
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT b.body, r.etag, r.last_modified, r.fetched_at FROM responses r JOIN blobs b ON b.digest = r.digest WHERE r.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used_at = ? WHERE url = ?", (self._clock(), url))
+        return CachedResponse(body=zlib.decompress(row[0]), etag=row[1], last_modified=row[2], fetched_at=row[3])
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """Offline, everything cached is served; otherwise entries older than max_age are revalidated first."""
+        return self.offline or self._clock() - entry.fetched_at < self.max_age
+
+    def touch(self, url: str):
+        """Records a successful revalidation (304): the cached body is fresh again."""
+        now = self._clock()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET fetched_at = ?, last_used_at = ? WHERE url = ?", (now, now, url))
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        digest = hashlib.sha256(body).hexdigest()
+        now = self._clock()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                previous = self._conn.execute("SELECT digest FROM responses WHERE url = ?", (url,)).fetchone()
+                if self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None:
+                    compressed = zlib.compress(body, COMPRESSION_LEVEL)
+                    self._conn.execute("INSERT INTO blobs (digest, body, size) VALUES (?, ?, ?)", (digest, compressed, len(compressed)))
+                    self._bytes += len(compressed)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (url, digest, etag, last_modified, fetched_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, digest, etag, last_modified, now, now),
+                )
+                if previous is not None and previous[0] != digest:
+                    # The resource changed; its old body goes unless another URL shares it.
+                    self._delete_orphans()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.stores += 1
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _delete_orphans(self):
+        orphans = self._conn.execute(
+            "SELECT digest, size FROM blobs WHERE digest NOT IN (SELECT digest FROM responses)"
+        ).fetchall()
+        if orphans:
+            self._conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest, _ in orphans])
+            self._bytes -= sum(size for _, size in orphans)
+
+    def _evict(self):
+        """Drops least recently used URLs until the store is back under EVICT_TO of the cap. Holds the lock."""
+        target = self.max_bytes * EVICT_TO
+        self._conn.execute("BEGIN")
+        try:
+            while self._bytes > target:
+                urls = self._conn.execute("SELECT url FROM responses ORDER BY last_used_at LIMIT 16").fetchall()
+                if not urls:
+                    break
+                self._conn.executemany("DELETE FROM responses WHERE url = ?", urls)
+                self.evictions += len(urls)
+                self._delete_orphans()
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM blobs")
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "mode": "offline" if self.offline else "on",
+            "entries": entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """The process-wide cache, opened on first use; None when POKEAPI_CACHE=off."""
+    global _cache
+    if _cache is None and CACHE_MODE != "off":
+        _cache = ResponseCache(offline=CACHE_MODE == "offline")
+    return _cache
+
+
+def set_cache(cache: Optional[ResponseCache]):
+    """Swaps the process-wide cache, e.g. for a temporary file in benchmarks."""
+    global _cache
+    _cache = cache
+
+
+metrics.registry.collect(
+    "pokeapi_response_cache", lambda: _cache.stats() if _cache else {},
+    counters=("hits", "revalidated", "misses", "stores", "evictions"), help="On-disk cache of raw PokéAPI responses.",
+)
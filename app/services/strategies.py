@@ -0,0 +1,270 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from . import llm_client
+from .battle_engine import (
+    ATTACK_POINT_REGEN, DAMAGING_STATUSES, MAX_ATTACK_POINTS, PARALYSIS_SKIP_CHANCE,
+    BattleEngine, LogCode, BattlePokemon, plan_bands, status_damage,
+)
+
+SEARCH_DEPTH = int(os.environ.get("BATTLE_SEARCH_DEPTH", "4"))
+MAX_TABLE_ENTRIES = int(os.environ.get("BATTLE_SEARCH_TABLE_SIZE", "500000"))
+
+
+class Strategy:
+    """
+    Chooses moves for a BattleEngine. `choose_move` returns {'chosen_move', 'strategy', 'commentary'},
+    with chosen_move None to skip the turn; summary-only battles read just chosen_move. Strategies that
+    write commentary after the battle set `batch_commentary`, and the engine then hands them every
+    action in `end_battle`.
+    """
+    name = "strategy"
+    batch_commentary = False
+
+    async def start_battle(self, engine: BattleEngine):
+        pass
+
+    async def choose_move(self, engine: BattleEngine, attacker: BattlePokemon, defender: BattlePokemon) -> dict:
+        raise NotImplementedError
+
+    async def end_battle(self, engine: BattleEngine, actions: List[str]) -> List[str]:
+        """Returns one commentary line per action description (only called with batch_commentary)."""
+        return actions
+
+
+class LLMStrategy(Strategy):
+    """One LLM call per decision (served from the decision cache when the state repeats)."""
+    name = "llm"
+
+    async def choose_move(self, engine, attacker, defender) -> dict:
+        return await llm_client.get_strategic_move_and_commentary(attacker, defender, engine.turn_count)
+
+
+class PlannedLLMStrategy(Strategy):
+    """
+    One LLM call plans the whole battle as a move policy per (HP band, AP band) for both sides, the
+    engine executes it locally, and one more call writes all the commentary. Holds the battle's
+    plan, so use a fresh instance per battle.
+    """
+    name = "planned"
+    batch_commentary = True
+
+    def __init__(self):
+        self.plans: Dict[str, dict] = {}
+
+    async def start_battle(self, engine):
+        self.plans = await llm_client.get_battle_plan(engine.p1, engine.p2)
+        for key, pokemon in (("pokemon1", engine.p1), ("pokemon2", engine.p2)):
+            strategy = self.plans.get(key, {}).get("strategy")
+            engine.log(LogCode.PLAN, pokemon.name, strategy)
+        engine.log(LogCode.SEPARATOR)
+
+    async def choose_move(self, engine, attacker, defender) -> dict:
+        hp_band, ap_band = plan_bands(attacker)
+        plan = self.plans.get("pokemon1" if attacker is engine.p1 else "pokemon2", {})
+        preferences = plan.get("policy", {}).get(hp_band, {}).get(ap_band, [])
+        affordable = {move.name for move in attacker.moves if (move.power or 0) <= attacker.attack_points}
+        move_name = next((name for name in preferences if name in affordable), None)
+        band_text = f"{hp_band.replace('_', ' ').upper()}, {ap_band.replace('_', ' ').upper()}"
+        if move_name:
+            return {"chosen_move": move_name, "strategy": f"Plan ({band_text}): {move_name.replace('-', ' ').title()}"}
+
+        fallback = engine.strongest_affordable_move(attacker)
+        if fallback:
+            return {"chosen_move": fallback.name, "strategy": f"Plan ({band_text}) has no affordable move; using the strongest one."}
+        return {"chosen_move": None, "strategy": f"Plan ({band_text}): {attacker.name} saves up Attack Points."}
+
+    async def end_battle(self, engine, actions):
+        return await llm_client.get_battle_commentary(actions)
+
+
+class GreedyStrategy(Strategy):
+    """The LLM failsafe as a policy: always the strongest affordable move. Same policy as the Monte Carlo tool."""
+    name = "greedy"
+
+    async def choose_move(self, engine, attacker, defender) -> dict:
+        move = engine.strongest_affordable_move(attacker)
+        if engine.summary_only:
+            return {"chosen_move": move.name if move else None}
+        if move is None:
+            return {
+                "chosen_move": None,
+                "strategy": f"{attacker.name} needs to build up more Attack Points.",
+                "commentary": f"{attacker.name} conserves its energy, waiting for the right moment to strike!",
+            }
+        move_title = move.name.replace('-', ' ').title()
+        return {
+            "chosen_move": move.name,
+            "strategy": f"Greedy: {move_title} is the strongest move {attacker.name} can afford.",
+            "commentary": f"{attacker.name} goes all in with {move_title}!",
+        }
+
+
+class _SearchContext:
+    """
+    Everything the search needs about one matchup, indexed by turn order (0 moves first each turn),
+    plus the transposition table for it. Statuses never change mid-battle, so they are fixed here.
+    """
+
+    def __init__(self, engine: BattleEngine, first: BattlePokemon, second: BattlePokemon):
+        sides = (first, second)
+        # Kept so their ids, which key the context, can't be reused while it is cached.
+        self.templates = (first.template, second.template)
+        self.max_hp = (first.max_hp, second.max_hp)
+        self.paralyzed = (first.status == 'Paralyzed', second.status == 'Paralyzed')
+        self.tick = tuple(status_damage(p.max_hp) if p.status in DAMAGING_STATUSES else 0 for p in sides)
+        # Per side: (move name, cost, damage) with the hardest hitters first, so ties favour damage.
+        self.options: Tuple[List[Tuple[str, int, int]], ...] = tuple(
+            sorted(
+                ((move.name, move.power or 0, engine.damage_table(p)[move.name][0]) for move in p.moves),
+                key=lambda option: option[2], reverse=True,
+            )
+            for p in sides
+        )
+        # (hp0, ap0, hp1, ap1, actor, depth) -> value for side 0
+        self.table: Dict[Tuple[int, int, int, int, int, int], float] = {}
+        # (hp0, ap0, hp1, ap1, actor) -> (value, move) at the root, so repeated positions skip the search.
+        self.decisions: Dict[Tuple[int, int, int, int, int], Tuple[float, Optional[str]]] = {}
+
+
+class ExpectiminimaxStrategy(Strategy):
+    """
+    Depth-limited expectiminimax over the battle rules: paralysis skips are chance nodes, and poison/
+    burn ticks and AP regeneration are applied between turns. Skipping a turn to bank AP is a legal
+    action. Values are memoized in a per-matchup transposition table that persists across moves and
+    battles, so repeated positions cost one dict lookup. Deterministic and network-free.
+
+    Depth counts single actions (one side moving), so the default of 4 looks two full turns ahead.
+    """
+    name = "expectiminimax"
+
+    def __init__(self, depth: int = SEARCH_DEPTH, max_table_entries: int = MAX_TABLE_ENTRIES):
+        self.depth = max(1, depth)
+        self.max_table_entries = max_table_entries
+        self._contexts: Dict[tuple, _SearchContext] = {}
+        self.nodes = 0
+        self.table_hits = 0
+
+    def _context(self, engine: BattleEngine, first: BattlePokemon, second: BattlePokemon) -> _SearchContext:
+        # Keyed on the species templates, like battle_engine's damage tables, so a species that comes
+        # back with other stats or moves gets a fresh table.
+        key = (id(first.template), id(second.template), first.status, second.status)
+        context = self._contexts.get(key)
+        if context is None or context.templates[0] is not first.template or context.templates[1] is not second.template:
+            if sum(len(c.table) for c in self._contexts.values()) > self.max_table_entries:
+                self._contexts.clear()
+            context = self._contexts[key] = _SearchContext(engine, first, second)
+        return context
+
+    def _evaluate(self, ctx: _SearchContext, hp0: int, hp1: int) -> float:
+        """Leaf heuristic in [0, 1] for side 0: the difference in remaining HP fractions."""
+        return 0.5 + 0.5 * (hp0 / ctx.max_hp[0] - hp1 / ctx.max_hp[1])
+
+    def _after_action(self, ctx: _SearchContext, hp0: int, ap0: int, hp1: int, ap1: int, actor: int, depth: int) -> float:
+        """Value once `actor` has acted: the other side moves next, or the turn ends."""
+        if hp0 <= 0:
+            return 0.0
+        if hp1 <= 0:
+            return 1.0
+        if actor == 0:
+            return self._value(ctx, hp0, ap0, hp1, ap1, 1, depth - 1)
+
+        hp0 = max(0, hp0 - ctx.tick[0])
+        hp1 = max(0, hp1 - ctx.tick[1])
+        if hp0 <= 0 or hp1 <= 0:
+            return 0.5 if hp0 <= 0 and hp1 <= 0 else (1.0 if hp1 <= 0 else 0.0)
+        ap0 = min(MAX_ATTACK_POINTS, ap0 + ATTACK_POINT_REGEN)
+        ap1 = min(MAX_ATTACK_POINTS, ap1 + ATTACK_POINT_REGEN)
+        return self._value(ctx, hp0, ap0, hp1, ap1, 0, depth - 1)
+
+    def _best(self, ctx: _SearchContext, hp0: int, ap0: int, hp1: int, ap1: int, actor: int, depth: int) -> Tuple[float, Optional[str]]:
+        """Best (value, move) for `actor`, who maximizes side 0's value as side 0 and minimizes it as side 1."""
+        # Moves are tried hardest-hitting first and skipping last, and only a strictly better value
+        # replaces the incumbent, so equal lines (e.g. a lost position) still attack.
+        best_value, best_move = None, None
+        for move_name, cost, damage in ctx.options[actor]:
+            if actor == 0:
+                if cost > ap0:
+                    continue
+                value = self._after_action(ctx, hp0, ap0 - cost, hp1 - damage, ap1, actor, depth)
+                if best_value is None or value > best_value:
+                    best_value, best_move = value, move_name
+            else:
+                if cost > ap1:
+                    continue
+                value = self._after_action(ctx, hp0 - damage, ap0, hp1, ap1 - cost, actor, depth)
+                if best_value is None or value < best_value:
+                    best_value, best_move = value, move_name
+        skip_value = self._after_action(ctx, hp0, ap0, hp1, ap1, actor, depth)
+        if best_value is None or (skip_value > best_value if actor == 0 else skip_value < best_value):
+            best_value, best_move = skip_value, None
+        return best_value, best_move
+
+    def _value(self, ctx: _SearchContext, hp0: int, ap0: int, hp1: int, ap1: int, actor: int, depth: int) -> float:
+        if depth <= 0:
+            return self._evaluate(ctx, hp0, hp1)
+        key = (hp0, ap0, hp1, ap1, actor, depth)
+        value = ctx.table.get(key)
+        if value is not None:
+            self.table_hits += 1
+            return value
+
+        self.nodes += 1
+        value = self._best(ctx, hp0, ap0, hp1, ap1, actor, depth)[0]
+        if ctx.paralyzed[actor]:
+            skipped = self._after_action(ctx, hp0, ap0, hp1, ap1, actor, depth)
+            value = PARALYSIS_SKIP_CHANCE * skipped + (1 - PARALYSIS_SKIP_CHANCE) * value
+        ctx.table[key] = value
+        return value
+
+    def search(self, engine: BattleEngine, attacker: BattlePokemon) -> Tuple[float, Optional[str]]:
+        """Returns (estimated win score for the attacker, best move or None to skip)."""
+        first, second = engine.turn_order()
+        ctx = self._context(engine, first, second)
+        actor = 0 if attacker is first else 1
+        key = (first.current_hp, first.attack_points, second.current_hp, second.attack_points, actor)
+        decision = ctx.decisions.get(key)
+        if decision is None:
+            decision = ctx.decisions[key] = self._best(ctx, *key, self.depth)
+        value, move_name = decision
+        return (value if actor == 0 else 1.0 - value), move_name
+
+    async def choose_move(self, engine, attacker, defender) -> dict:
+        score, move_name = self.search(engine, attacker)
+        if engine.summary_only:
+            return {"chosen_move": move_name}
+        if move_name is None:
+            return {
+                "chosen_move": None,
+                "strategy": f"Expectiminimax (depth {self.depth}): {attacker.name} banks Attack Points (score {score:.2f}).",
+                "commentary": f"{attacker.name} bides its time, saving energy for a bigger strike!",
+            }
+        move_title = move_name.replace('-', ' ').title()
+        return {
+            "chosen_move": move_name,
+            "strategy": f"Expectiminimax (depth {self.depth}): {move_title} (score {score:.2f}).",
+            "commentary": f"{attacker.name} reads the battle perfectly and fires off {move_title}!",
+        }
+
+    def stats(self) -> dict:
+        return {
+            "matchups": len(self._contexts),
+            "table_entries": sum(len(c.table) for c in self._contexts.values()),
+            "nodes": self.nodes,
+            "table_hits": self.table_hits,
+        }
+
+
+# Stateless or shareable strategies are reused so the search keeps its transposition tables warm.
+_shared = {"llm": LLMStrategy(), "greedy": GreedyStrategy(), "expectiminimax": ExpectiminimaxStrategy()}
+STRATEGY_NAMES = sorted([*_shared, PlannedLLMStrategy.name])
+
+
+def get_strategy(name: str) -> Strategy:
+    """Looks up a strategy by name: llm, planned, greedy or expectiminimax."""
+    name = (name or "llm").lower()
+    if name == PlannedLLMStrategy.name:
+        return PlannedLLMStrategy()
+    if name not in _shared:
+        raise ValueError(f"Unknown strategy '{name}'. Choose one of: {', '.join(STRATEGY_NAMES)}")
+    return _shared[name]
@@ -0,0 +1,241 @@
+"""
+Round-robin tournaments: every pairing of a list of Pokémon, K battles each, spread over a process pool.
+
+Each worker loads the Pokémon from the SQLite database once, then plays chunks of pairings and sends
+back win counts, which are merged into the win-rate matrix as they arrive. The ranking is an
+Elo-scale Bradley-Terry fit of all results.
+
+Usage:
+    python -m app.services.tournament bulbasaur charmander squirtle pikachu [--repetitions 200]
+    python -m app.services.tournament --all --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import monte_carlo
+from .battle_engine import SEED_LIMIT, BattleEngine
+from .database_client import DATABASE_URL, create_database_engine, get_all_pokemon_names, get_pokemon_from_db
+from .poke_api_client import load_stored_pokemon, normalize_name
+from ..models.pydantic_models import PokemonData
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPETITIONS = 100
+MAX_REPETITIONS = 100_000
+# "montecarlo" runs the vectorized greedy simulator; the others play full BattleEngine battles.
+ENGINES = ("montecarlo", "greedy", "expectiminimax")
+PAIRS_PER_TASK = 64
+ELO_BASE = 1500.0
+
+# Per-worker state, set by the pool initializer.
+_pokemon: List[PokemonData] = []
+
+
+async def _load_pokemon(database_url: str, names: Sequence[str], create_tables: bool = False) -> List[PokemonData]:
+    engine = create_database_engine(database_url)
+    try:
+        if create_tables:
+            async with engine.begin() as conn:
+                await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            loaded = []
+            for name in names:
+                pokemon = await load_stored_pokemon(name, session)
+                if pokemon is None:
+                    raise LookupError(f"'{name}' is not in the database")
+                loaded.append(pokemon)
+            return loaded
+    finally:
+        await engine.dispose()
+
+
+def _init_worker(database_url: str, names: List[str]):
+    global _pokemon
+    _pokemon = asyncio.run(_load_pokemon(database_url, names))
+
+
+async def _play_battles(first: PokemonData, second: PokemonData, repetitions: int, seed: int, strategy) -> int:
+    rng = random.Random(seed)
+    wins = 0
+    for _ in range(repetitions):
+        engine = BattleEngine(first, second, strategy=strategy, seed=rng.randrange(SEED_LIMIT), summary_only=True)
+        result = await engine.simulate_battle()
+        wins += result["winner"] == engine.p1.name
+    return wins
+
+
+def _play_chunk(engine_name: str, repetitions: int, pairs: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Plays (i, j, seed) pairings, returning (i, j, wins of i over j)."""
+    if engine_name == "montecarlo":
+        results = []
+        for i, j, seed in pairs:
+            odds = monte_carlo.simulate_matchup(_pokemon[i], _pokemon[j], battles=repetitions, seed=seed)
+            results.append((i, j, round(odds["pokemon1_win_probability"] * repetitions)))
+        return results
+
+    from .strategies import get_strategy
+    strategy = get_strategy(engine_name)
+
+    async def play():
+        return [(i, j, await _play_battles(_pokemon[i], _pokemon[j], repetitions, seed, strategy)) for i, j, seed in pairs]
+    return asyncio.run(play())
+
+
+def elo_ratings(wins: np.ndarray, iterations: int = 500) -> np.ndarray:
+    """
+    Bradley-Terry strengths fitted to a wins[i, j] matrix (minorization-maximization), on the Elo scale:
+    a 400-point gap means 10:1 odds. Half a win is added per player so unbeaten or winless entries stay finite.
+    """
+    games = wins + wins.T
+    won = wins.sum(axis=1) + 0.5
+    strength = np.ones(len(wins))
+    for _ in range(iterations):
+        pair_sum = strength[:, None] + strength[None, :]
+        updated = won / (games / pair_sum).sum(axis=1).clip(min=1e-12)
+        updated /= np.exp(np.log(updated).mean())
+        converged = np.allclose(updated, strength, rtol=1e-10)
+        strength = updated
+        if converged:
+            break
+    return ELO_BASE + 400 * np.log10(strength)
+
+
+async def resolve_names(names: Optional[Sequence[str]], database_url: str = DATABASE_URL) -> List[str]:
+    """
+    Maps names or Pokédex IDs to stored names, de-duplicated; None means every Pokémon in the database.
+    Raises LookupError naming anything that is not stored.
+    """
+    engine = create_database_engine(database_url)
+    try:
+        async with AsyncSession(engine) as session:
+            if names is None:
+                return await get_all_pokemon_names(session)
+            resolved, missing = [], []
+            for name in dict.fromkeys(normalize_name(name) for name in names if name.strip()):
+                db_pokemon = await get_pokemon_from_db(name, session)
+                if db_pokemon is None:
+                    missing.append(name)
+                else:
+                    resolved.append(db_pokemon.name)
+    finally:
+        await engine.dispose()
+    if missing:
+        raise LookupError(f"Not in the database: {', '.join(missing)}")
+    return list(dict.fromkeys(resolved))
+
+
+async def run_tournament(names: Sequence[str], database_url: str = DATABASE_URL, repetitions: int = DEFAULT_REPETITIONS,
+                         engine: str = "montecarlo", workers: Optional[int] = None, seed: Optional[int] = None,
+                         on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None) -> dict:
+    """
+    Plays every pairing of `names` (all stored in `database_url`) `repetitions` times. Each pairing
+    is played once with the first name as pokemon1, so ties in speed go to the earlier entry.
+    `await on_progress(done_pairs, total_pairs)` runs as results are merged. `workers` is capped
+    at the CPU count.
+    """
+    names = list(names)
+    if len(names) < 2:
+        raise ValueError("A tournament needs at least two Pokémon")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+    if not 1 <= repetitions <= MAX_REPETITIONS:
+        raise ValueError(f"repetitions must be between 1 and {MAX_REPETITIONS}")
+
+    cpus = os.cpu_count() or 1
+    workers = cpus if workers is None else max(1, min(int(workers), cpus))
+
+    started = time.perf_counter()
+    seed = seed if seed is not None else random.randrange(SEED_LIMIT)
+    seeds = np.random.SeedSequence(seed)
+    pairs = [(i, j) for i in range(len(names)) for j in range(i + 1, len(names))]
+    pair_seeds = seeds.generate_state(len(pairs)).tolist()
+    tasks = [[(i, j, s) for (i, j), s in zip(pairs[k:k + PAIRS_PER_TASK], pair_seeds[k:k + PAIRS_PER_TASK])]
+             for k in range(0, len(pairs), PAIRS_PER_TASK)]
+
+    # Databases from older versions lack the snapshot table: create it and backfill the entrants
+    # once here, so the workers only read.
+    await _load_pokemon(database_url, names, create_tables=True)
+
+    wins = np.zeros((len(names), len(names)), dtype=np.int64)
+    done = 0
+    loop = asyncio.get_running_loop()
+    # Spawned workers start clean instead of inheriting the parent's event loop and connections.
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context, initializer=_init_worker,
+                               initargs=(database_url, names))
+    try:
+        futures = [loop.run_in_executor(pool, _play_chunk, engine, repetitions, task) for task in tasks]
+        for future in asyncio.as_completed(futures):
+            results = await future
+            for i, j, won in results:
+                wins[i, j] = won
+                wins[j, i] = repetitions - won
+            done += len(results)
+            if on_progress:
+                await on_progress(done, len(pairs))
+    finally:
+        # Not waiting: on cancellation or an error the queued chunks are dropped instead of blocking
+        # the event loop until every one of them has been played.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    win_rate = wins / repetitions
+    ratings = elo_ratings(wins)
+    overall = wins.sum(axis=1) / (repetitions * (len(names) - 1))
+    order = sorted(range(len(names)), key=lambda k: -ratings[k])
+    return {
+        "pokemon": names,
+        "engine": engine,
+        "repetitions": repetitions,
+        "seed": seed,
+        "pairings": len(pairs),
+        "win_rate_matrix": [[None if i == j else float(win_rate[i, j]) for j in range(len(names))] for i in range(len(names))],
+        "ranking": [
+            {"rank": rank, "name": names[k], "elo": round(float(ratings[k]), 1), "win_rate": float(overall[k])}
+            for rank, k in enumerate(order, start=1)
+        ],
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin tournament between Pokémon stored in the database.")
+    parser.add_argument("names", nargs="*", help="Pokémon names or Pokédex IDs (they must already be in the database).")
+    parser.add_argument("--all", action="store_true", help="Use every Pokémon in the database.")
+    parser.add_argument("--database", default="pokemon.db", help="SQLite file to read (default: pokemon.db).")
+    parser.add_argument("--repetitions", type=int, default=DEFAULT_REPETITIONS, help="Battles per pairing.")
+    parser.add_argument("--engine", choices=ENGINES, default="montecarlo", help="How each pairing is played.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: CPU count).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible tournament.")
+    parser.add_argument("--top", type=int, default=20, help="Ranking rows to print.")
+    args = parser.parse_args()
+    if not args.all and len(args.names) < 2:
+        parser.error("give at least two names, or --all")
+
+    logging.basicConfig(level=logging.INFO)
+    database_url = f"sqlite+aiosqlite:///{args.database}"
+
+    async def run():
+        names = await resolve_names(None if args.all else args.names, database_url)
+        async def progress(done, total):
+            logger.info(f"{done}/{total} pairings")
+        return await run_tournament(names, database_url, args.repetitions, args.engine, args.workers, args.seed, progress)
+
+    summary = asyncio.run(run())
+    for row in summary["ranking"][:args.top]:
+        print(f"{row['rank']:>4}. {row['name']:<20} Elo {row['elo']:>7.1f}   win rate {row['win_rate']:.1%}")
+    logger.info(f"{summary['pairings']} pairings x {summary['repetitions']} battles in {summary['elapsed_seconds']:.1f}s (seed {summary['seed']})")
+
+
+if __name__ == "__main__":
+    main()
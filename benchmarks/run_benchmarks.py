@@ -0,0 +1,296 @@
+"""
+Benchmarks for the server's hot paths, fully offline: PokéAPI is replaced by an in-process
+httpx.MockTransport stub, the LLM by FakeBackend, and everything runs against a throwaway SQLite
+database, so the numbers only measure our own code.
+
+Measured:
+  - get_pokemon_details latency for in-memory cache hits, DB hits and DB misses (stubbed fetch + store)
+  - add_pokemon_to_db write throughput
+  - _convert_db_pokemon_to_pydantic cost
+  - BattleEngine.simulate_battle turns/sec (greedy and fake-LLM strategies)
+  - end-to-end llm_battle_simulator tool-call latency through an in-process MCP client
+
+Results are printed as JSON and compared with benchmarks/baseline.json; the exit status is 1 if
+any metric is more than --tolerance worse than its baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --output results.json --tolerance 0.3
+    python benchmarks/run_benchmarks.py --save-baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+# A metric regresses when it is this fraction worse than the baseline (timings are noisy across machines).
+DEFAULT_TOLERANCE = 0.5
+
+# The database paths and LLM backend are read at import time, so they are set before importing the app.
+_workdir = tempfile.mkdtemp(prefix="pokemon-bench-")
+os.environ["POKEMON_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/bench.db"
+os.environ["POKEAPI_CACHE_PATH"] = f"{_workdir}/pokeapi_cache.db"
+os.environ["LLM_BACKEND"] = "fake"
+sys.path.insert(0, str(ROOT))
+
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.services import battle_engine, database_client, http_client, move_catalog, poke_api_client, strategies  # noqa: E402
+from app.services.decision_cache import decision_cache  # noqa: E402
+from app.services.pokemon_cache import pokemon_cache  # noqa: E402
+
+POKEAPI = poke_api_client.POKEAPI_BASE_URL
+TYPES = [
+    "normal", "fire", "water", "grass", "electric", "ice", "fighting", "poison", "ground",
+    "flying", "psychic", "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy",
+]
+STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+
+SPECIES = 48
+MOVES = 240
+MOVES_PER_SPECIES = 40
+EVOLUTION_FAMILY = 3
+WRITES = 200
+CONVERSIONS = 2000
+BATTLES = 300
+TOOL_CALLS = 20
+
+
+# --- Local PokéAPI stub ---
+
+def _stub_move(i: int) -> dict:
+    return {
+        "name": f"bench-move-{i}",
+        "power": None if i % 5 == 0 else 30 + (i * 37) % 120,
+        "type": {"name": TYPES[i % len(TYPES)]},
+        "damage_class": {"name": ("physical", "special", "status")[i % 3]},
+    }
+
+
+def _stub_pokemon(i: int) -> dict:
+    types = [TYPES[i % len(TYPES)]]
+    if i % 2 and TYPES[(i * 7) % len(TYPES)] not in types:
+        types.append(TYPES[(i * 7) % len(TYPES)])
+    return {
+        "id": i,
+        "name": f"benchmon-{i}",
+        "species": {"url": f"{POKEAPI}/pokemon-species/{i}/"},
+        "types": [{"slot": slot, "type": {"name": name}} for slot, name in enumerate(types, start=1)],
+        "stats": [{"stat": {"name": name}, "base_stat": 40 + (i * (k + 3) * 11) % 90} for k, name in enumerate(STAT_NAMES)],
+        "abilities": [{"ability": {"name": f"bench-ability-{i % 20}"}, "is_hidden": False}],
+        "sprites": {"front_default": None},
+        "moves": [
+            {"move": {"name": f"bench-move-{m}", "url": f"{POKEAPI}/move/bench-move-{m}/"}}
+            for m in ((i * 17 + k * 7) % MOVES for k in range(MOVES_PER_SPECIES))
+        ],
+    }
+
+
+def _stub_evolution_chain(family: int) -> dict:
+    chain = None
+    for i in reversed(range(family * EVOLUTION_FAMILY + 1, family * EVOLUTION_FAMILY + EVOLUTION_FAMILY + 1)):
+        chain = {"species": {"name": f"benchmon-{i}"}, "evolves_to": [chain] if chain else []}
+    return {"chain": chain}
+
+
+def _pokeapi_stub(request: httpx.Request) -> httpx.Response:
+    parts = request.url.path.strip("/").split("/")[2:]  # drop "api/v2"
+    kind, key = parts[0], parts[1] if len(parts) > 1 else ""
+    if kind == "pokemon":
+        number = int(key) if key.isdigit() else int(key.rsplit("-", 1)[-1]) if key.startswith("benchmon-") else 0
+        if 1 <= number <= SPECIES:
+            return httpx.Response(200, json=_stub_pokemon(number))
+    elif kind == "pokemon-species" and key.isdigit():
+        family = (int(key) - 1) // EVOLUTION_FAMILY
+        return httpx.Response(200, json={"evolution_chain": {"url": f"{POKEAPI}/evolution-chain/{family}/"}})
+    elif kind == "evolution-chain" and key.isdigit():
+        return httpx.Response(200, json=_stub_evolution_chain(int(key)))
+    elif kind == "move" and key.startswith("bench-move-"):
+        return httpx.Response(200, json=_stub_move(int(key.rsplit("-", 1)[-1])))
+    return httpx.Response(404, text="Not Found")
+
+
+# --- Measurement helpers ---
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _latency(samples: List[float]) -> dict:
+    """Latency metric in milliseconds; compared on the median."""
+    samples_ms = [s * 1000 for s in samples]
+    return {
+        "value": round(_percentile(samples_ms, 0.5), 4), "unit": "ms", "higher_is_better": False,
+        "p99": round(_percentile(samples_ms, 0.99), 4), "mean": round(sum(samples_ms) / len(samples_ms), 4),
+        "samples": len(samples_ms),
+    }
+
+
+def _throughput(count: int, seconds: float, unit: str) -> dict:
+    return {"value": round(count / seconds, 1), "unit": unit, "higher_is_better": True, "samples": count}
+
+
+async def _timed_details(name: str) -> float:
+    async with AsyncSession(database_client.engine) as session:
+        started = time.perf_counter()
+        await poke_api_client.get_pokemon_details(name, session)
+        return time.perf_counter() - started
+
+
+# --- Benchmarks ---
+
+async def bench_pokemon_details(names: List[str]) -> Dict[str, dict]:
+    misses = []
+    for name in names:
+        misses.append(await _timed_details(name))
+    db_hits = []
+    for _ in range(3):
+        for name in names:
+            pokemon_cache.clear()
+            db_hits.append(await _timed_details(name))
+    cache_hits = [await _timed_details(name) for _ in range(10) for name in names]
+    return {
+        "get_pokemon_details.db_miss": _latency(misses),
+        "get_pokemon_details.db_hit": _latency(db_hits),
+        "get_pokemon_details.cache_hit": _latency(cache_hits),
+    }
+
+
+async def bench_add_pokemon(names: List[str]) -> Dict[str, dict]:
+    templates = [pokemon_cache.get(name) for name in names]
+    rows = [
+        templates[i % len(templates)].model_copy(update={"id": 100_000 + i, "name": f"bench-write-{i}"}).model_dump()
+        for i in range(WRITES)
+    ]
+    async with AsyncSession(database_client.engine) as session:
+        started = time.perf_counter()
+        for row in rows:
+            await database_client.add_pokemon_to_db(row, session)
+        elapsed = time.perf_counter() - started
+    return {"add_pokemon_to_db.throughput": _throughput(len(rows), elapsed, "pokemon/s")}
+
+
+async def bench_convert(names: List[str]) -> Dict[str, dict]:
+    async with AsyncSession(database_client.engine) as session:
+        rows = [await database_client.get_pokemon_from_db(name, session) for name in names]
+        started = time.perf_counter()
+        for i in range(CONVERSIONS):
+            poke_api_client._convert_db_pokemon_to_pydantic(rows[i % len(rows)])
+        elapsed = time.perf_counter() - started
+    return {"convert_db_pokemon_to_pydantic.latency": {
+        "value": round(elapsed / CONVERSIONS * 1e6, 2), "unit": "us", "higher_is_better": False, "samples": CONVERSIONS,
+    }}
+
+
+async def bench_battles(names: List[str]) -> Dict[str, dict]:
+    pokemon = [pokemon_cache.get(name) for name in names]
+    results = {}
+    for strategy_name in ("greedy", "llm"):
+        strategy = strategies.get_strategy(strategy_name)
+        turns = 0
+        started = time.perf_counter()
+        for i in range(BATTLES):
+            engine = battle_engine.BattleEngine(pokemon[i % len(pokemon)], pokemon[(i * 7 + 1) % len(pokemon)], strategy=strategy, seed=i)
+            await engine.simulate_battle()
+            turns += engine.turn_count
+        results[f"simulate_battle.{strategy_name}"] = _throughput(turns, time.perf_counter() - started, "turns/s")
+    return results
+
+
+async def bench_tool_call(names: List[str]) -> Dict[str, dict]:
+    from fastmcp import Client
+    import server
+
+    samples = []
+    async with Client(server.mcp) as client:
+        for i in range(TOOL_CALLS):
+            req = {"pokemon1_name": names[i % len(names)], "pokemon2_name": names[(i * 5 + 3) % len(names)], "seed": i}
+            started = time.perf_counter()
+            await client.call_tool("llm_battle_simulator", {"req": req})
+            samples.append(time.perf_counter() - started)
+    return {"llm_battle_simulator.tool_call": _latency(samples)}
+
+
+async def run_all() -> Dict[str, dict]:
+    await database_client.init_db()
+    await http_client.set_transport(httpx.MockTransport(_pokeapi_stub))
+    # Nothing may be served from a previous run in this process.
+    pokemon_cache.clear()
+    move_catalog._catalog.clear()
+    decision_cache.clear()
+
+    names = [f"benchmon-{i}" for i in range(1, SPECIES + 1)]
+    results = {}
+    results.update(await bench_pokemon_details(names))
+    results.update(await bench_add_pokemon(names))
+    results.update(await bench_convert(names))
+    results.update(await bench_battles(names))
+    results.update(await bench_tool_call(names))
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> Dict[str, dict]:
+    """Per metric: the baseline value, the relative slowdown (positive is worse) and whether it regressed."""
+    comparison = {}
+    for name, metric in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("value") or not metric["value"]:
+            continue
+        if metric["higher_is_better"]:
+            slowdown = base["value"] / metric["value"] - 1
+        else:
+            slowdown = metric["value"] / base["value"] - 1
+        comparison[name] = {"baseline": base["value"], "slowdown": round(slowdown, 3), "regressed": slowdown > tolerance}
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Pokémon MCP server's hot paths.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results to --baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown before a metric counts as regressed (default {DEFAULT_TOLERANCE}).")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # The app reports cache hits and misses with print(); keep stdout for the JSON report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = asyncio.run(run_all())
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+    report = {
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "benchmarks": results,
+    }
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+    elif args.baseline.exists():
+        report["comparison"] = compare(results, json.loads(args.baseline.read_text())["benchmarks"], args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    regressed = [name for name, row in report.get("comparison", {}).items() if row["regressed"]]
+    if regressed:
+        print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,15 +9,23 @@ class MCPClient:
         self.process = process
         self.request_id = 0
 
-    async def _send_request(self, method: str, params: dict) -> dict:
+    async def _send_request(self, method: str, params: dict, on_progress=None) -> dict:
         self.request_id += 1
         request = { "jsonrpc": "2.0", "method": method, "params": params, "id": self.request_id }
+        if on_progress:
+            request["params"] = {**params, "_meta": {"progressToken": self.request_id}}
         request_str = json.dumps(request) + "\n"
         self.process.stdin.write(request_str.encode("utf-8"))
         await self.process.stdin.drain()
-        response_str = await self.process.stdout.readline()
-        if not response_str: raise Exception("No response from server")
-        return json.loads(response_str)
+        while True:
+            response_str = await self.process.stdout.readline()
+            if not response_str: raise Exception("No response from server")
+            message = json.loads(response_str)
+            # Progress notifications stream in before the final response
+            if message.get("method") == "notifications/progress":
+                if on_progress: on_progress(message["params"].get("message", ""))
+                continue
+            return message
 
     async def initialize(self):
         init_request = { "jsonrpc": "2.0", "method": "initialize", "params": { "protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "pokemon-client", "version": "1.0.0"} }, "id": 1 }
@@ -30,11 +38,11 @@ class MCPClient:
         self.process.stdin.write(init_str.encode("utf-8"))
         await self.process.stdin.drain()
 
-    async def llm_battle_simulator(self, pokemon1_name: str, pokemon2_name: str):
+    async def llm_battle_simulator(self, pokemon1_name: str, pokemon2_name: str, on_progress=None):
         return await self._send_request("tools/call", {
             "name": "llm_battle_simulator",
             "arguments": { "req": { "pokemon1_name": pokemon1_name, "pokemon2_name": pokemon2_name } }
-        })
+        }, on_progress)
 
 def print_narrative(text, delay=0.02, slow_after_colon=False):
     for i, char in enumerate(text):
@@ -44,6 +52,18 @@ def print_narrative(text, delay=0.02, slow_after_colon=False):
             time.sleep(0.3)
     print()
 
+def print_battle_lines(message: str):
+    """Prints one streamed turn of the battle as soon as the server reports it."""
+    for line in message.splitlines():
+        if "### --- Turn" in line:
+            print_narrative(f"\n{line}", delay=0.05)
+        elif line.startswith("🎤"):
+            print_narrative(f"🎤: \"{line[1:].strip()}\"", delay=0.04, slow_after_colon=True)
+        elif "**LLM Strategy:**" in line:
+            print_narrative(f"🧠 {line}", delay=0.01)
+        elif line.strip() != "---":
+            print(line)
+
 async def main():
     print("Starting MCP server...")
     process = await create_subprocess_exec(
@@ -73,31 +93,12 @@ async def main():
                 p1_name, p2_name = parts[1], parts[3]
                 try:
                     print_narrative(f"\nRequesting an LLM-simulated battle for {p1_name.capitalize()} vs {p2_name.capitalize()}...")
-                    battle_response = await client.llm_battle_simulator(p1_name, p2_name)
+                    print_narrative("\n--- BATTLE START ---", delay=0.05)
+                    battle_response = await client.llm_battle_simulator(p1_name, p2_name, on_progress=print_battle_lines)
                     
                     if "result" in battle_response:
                         battle_data = battle_response['result']['structuredContent']
                         winner = battle_data.get('winner', 'Unknown')
-                        battle_log = battle_data.get('battle_log', [])
-                        commentary_log = battle_data.get('commentary_log', [])
-                        
-                        commentary_iter = iter(commentary_log)
-
-                        print_narrative("\n--- BATTLE START ---", delay=0.05)
-                        for line in battle_log:
-                            if "### --- Turn" in line:
-                                time.sleep(1)
-                                print_narrative(f"\n{line}", delay=0.05)
-                                try:
-                                    # Print commentary for the turn
-                                    next(commentary_iter) # Skip the '---' separator
-                                    print_narrative(f"🎤: \"{next(commentary_iter)}\"", delay=0.04, slow_after_colon=True)
-                                except StopIteration:
-                                    pass
-                            elif "**LLM Strategy**" in line:
-                                print_narrative(f"🧠 {line}", delay=0.01)
-                            elif line.strip() != "---":
-                                print(line)
 
                         print_narrative(f"\n🏆 BATTLE RESULT: {winner.capitalize()} wins! 🏆", delay=0.05)
 
@@ -1,13 +1,19 @@
 # In server.py
 import asyncio
+import base64
 import logging
 import sys
-from fastmcp import FastMCP
+import time
+from contextlib import asynccontextmanager
+import anyio
+from fastmcp import Context, FastMCP
 from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
 
-from app.services import poke_api_client, battle_engine, database_client
+from app.services import poke_api_client, battle_engine, battle_jobs, database_client, matchups, metrics, monte_carlo, http_client, llm_gateway, replay, response_cache, strategies, tournament
 from app.services.poke_api_client import PokemonNotFoundError
+from app.services.pokemon_cache import pokemon_cache
+from app.services.decision_cache import decision_cache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,26 +21,46 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-mcp = FastMCP("Pokémon LLM Battle Agent Server")
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Creates the schema once at startup and releases pooled connections on shutdown."""
+    await database_client.init_db()
+    try:
+        yield
+    finally:
+        # Shielded so cleanup still runs when shutdown arrives as a cancellation.
+        with anyio.CancelScope(shield=True):
+            await battle_jobs.job_queue.close()
+            await http_client.close_client()
+            await database_client.dispose_db()
+
+mcp = FastMCP("Pokémon LLM Battle Agent Server", lifespan=lifespan)
+
+# Battle progress: turns 1..MAX_TURNS, then one more step for the end of the battle.
+BATTLE_PROGRESS_TOTAL = battle_engine.MAX_TURNS + 1
+
+
+def _pokemon_payload(result) -> dict:
+    return {
+        "name": result.name,
+        "id": result.id,
+        "sprite_url": getattr(result, 'sprite_url', None),
+        "base_stats": result.base_stats,
+        "abilities": result.abilities,
+        "types": result.types,
+        "moves": result.moves,
+        "evolution": getattr(result, 'evolution', {})
+    }
+
 
 @mcp.resource("pokemon://{name}")
 async def get_pokemon(name: str) -> dict:
     # This function remains the same, it's a useful resource.
     try:
-        await database_client.init_db()
         async with AsyncSession(database_client.engine) as session:
             result = await poke_api_client.get_pokemon_details(name, session)
-            # The existing data formatting logic stays here...
-            return {
-                "name": result.name,
-                "id": result.id,
-                "sprite_url": getattr(result, 'sprite_url', None),
-                "base_stats": result.base_stats,
-                "abilities": result.abilities,
-                "types": result.types,
-                "moves": result.moves,
-                "evolution": getattr(result, 'evolution', {})
-            }
+            return _pokemon_payload(result)
     except PokemonNotFoundError as e:
         logger.error(f"Pokemon not found: {e}")
         raise Exception(f"Pokemon '{name}' not found")
@@ -43,11 +69,237 @@ async def get_pokemon(name: str) -> dict:
         raise Exception(f"Failed to get pokemon: {str(e)}")
 
 
+@mcp.resource("metrics://server")
+async def get_metrics() -> dict:
+    """
+    Operational counters for the server's caches and fetch paths, plus latency histograms
+    (count, mean, p50/p90/p99, max in seconds) for lookups, PokéAPI requests, LLM calls and battle turns.
+    """
+    cache = response_cache.get_cache()
+    registry = metrics.registry.snapshot()
+    counters = registry["counters"]
+    decisions = counters.get("llm_decisions_total", 0)
+    return {
+        "pokemon_fetch": poke_api_client.get_fetch_stats(),
+        "pokeapi_response_cache": cache.stats() if cache else {"mode": "off"},
+        "pokemon_cache": pokemon_cache.stats(),
+        "llm": llm_gateway.get_gateway().stats(),
+        "llm_decision_cache": decision_cache.stats(),
+        "llm_fallback_rate": counters.get("llm_fallbacks_total", 0) / decisions if decisions else 0.0,
+        "expectiminimax_search": strategies.get_strategy("expectiminimax").stats(),
+        "battle_jobs": battle_jobs.job_queue.stats(),
+        "counters": counters,
+        "timings": registry["histograms"],
+    }
+
+
+@mcp.resource("metrics://prometheus", mime_type="text/plain")
+async def get_prometheus_metrics() -> str:
+    """The same counters and histograms in the Prometheus text exposition format."""
+    return metrics.registry.prometheus_text()
+
+
+def _battle_request(req: dict):
+    """The two Pokémon names and the strategy of a battle request; raises if they are missing or unknown."""
+    pokemon1_name = req.get("pokemon1_name")
+    pokemon2_name = req.get("pokemon2_name")
+
+    if not pokemon1_name or not pokemon2_name:
+        raise Exception("Both pokemon1_name and pokemon2_name are required")
+    strategy = strategies.get_strategy("planned" if req.get("planning") else req.get("strategy", "llm"))
+    return pokemon1_name, pokemon2_name, strategy
+
+
+async def _play_battle(req: dict, on_turn) -> dict:
+    """Plays the battle described by `req`, awaiting on_turn(event) for each streamed BattleEvent."""
+    pokemon1_name, pokemon2_name, strategy = _battle_request(req)
+
+    async with AsyncSession(database_client.engine) as session:
+        # Fetch data for both Pokémon
+        pokemon1_data, pokemon2_data = await poke_api_client.get_pokemon_details_batch(
+            [pokemon1_name, pokemon2_name], session, return_exceptions=False
+        )
+
+    # Initialize the battle engine with the data
+    engine = battle_engine.BattleEngine(pokemon1_data, pokemon2_data, strategy=strategy, seed=req.get("seed"))
+
+    # Run the simulation turn by turn, handing each turn over as it finishes
+    async for event in engine.stream_battle():
+        await on_turn(event)
+
+    # Return the full result dictionary
+    return {
+        "winner": event.winner, "battle_log": engine.battle_log, "commentary_log": engine.commentary_log,
+        "replay": base64.b64encode(replay.encode(replay.from_engine(engine))).decode("ascii"),
+    }
+
+
 @mcp.tool()
-async def llm_battle_simulator(req: dict) -> dict:
+async def llm_battle_simulator(req: dict, ctx: Context) -> dict:
     """
     Simulates a Pokémon battle where an LLM acts as the strategist and commentator.
     Expects req with pokemon1_name and pokemon2_name.
+    Optional: strategy - "llm" (default, one LLM call per turn), "planned" (one LLM call plans the
+    whole battle and one more writes the commentary), "greedy" or "expectiminimax" (local search,
+    no LLM calls). planning=true is shorthand for strategy "planned".
+    Optional: seed (int) for a reproducible battle.
+    Clients that send a progress token receive each turn's log lines as a progress notification
+    while the battle runs; the full result is returned at the end, including a base64 `replay`
+    that battle_replay can re-render without the LLM.
+    For long battles, submit_battle runs the same battle in the background instead.
+    """
+    try:
+        async def report(event: battle_engine.BattleEvent):
+            lines = event.battle_log + [f"🎤 {line}" for line in event.commentary]
+            # Progress must strictly increase, and the end event carries the last turn's number again,
+            # so it is reported as one step past the longest possible battle.
+            progress = BATTLE_PROGRESS_TOTAL if event.kind == "end" else event.turn
+            await ctx.report_progress(progress=progress, total=BATTLE_PROGRESS_TOTAL, message="\n".join(lines))
+
+        return await _play_battle(req, report)
+
+    except PokemonNotFoundError as e:
+        logger.error(f"Pokemon not found during battle: {e}")
+        raise Exception(f"Pokemon not found: {str(e)}")
+    except Exception as e:
+        logger.error(f"Battle error: {e}")
+        raise Exception(f"Battle failed: {str(e)}")
+
+
+@mcp.tool()
+async def submit_battle(req: dict, ctx: Context) -> dict:
+    """
+    Queues a battle and returns its job_id immediately; the battle is played by a background worker.
+    Takes the same req as llm_battle_simulator. Poll battle_status, or call battle_result (optionally
+    with wait_seconds) to collect the result, which is kept for BATTLE_JOB_RESULT_TTL seconds.
+    Refused when the queue is full or this session already has BATTLE_JOB_CLIENT_QUOTA unfinished jobs.
+    """
+    try:
+        _battle_request(req)
+
+        async def run(job: battle_jobs.BattleJob) -> dict:
+            async def track(event: battle_engine.BattleEvent):
+                job.turn = event.turn
+            return await _play_battle(req, track)
+
+        # Quota per MCP session: the server assigns session IDs, whereas client_id is whatever the
+        # client puts in its request metadata and could be varied to dodge the quota.
+        job = battle_jobs.job_queue.submit(ctx.session_id, run)
+        return {"job_id": job.id, "status": job.status}
+
+    except Exception as e:
+        logger.error(f"Battle submission error: {e}")
+        raise Exception(f"Battle submission failed: {str(e)}")
+
+
+@mcp.tool()
+async def battle_status(req: dict) -> dict:
+    """
+    Reports a submitted battle's state. Expects req with job_id. Returns its status ("queued",
+    "running", "done" or "failed"), the current turn, timestamps, and the error of a failed job.
+    """
+    try:
+        job_id = req.get("job_id")
+        if not job_id:
+            raise Exception("job_id is required")
+        return battle_jobs.job_queue.get(job_id).describe()
+
+    except Exception as e:
+        logger.error(f"Battle status error: {e}")
+        raise Exception(f"Battle status failed: {str(e)}")
+
+
+@mcp.tool()
+async def battle_result(req: dict, ctx: Context) -> dict:
+    """
+    Collects a submitted battle. Expects req with job_id; optional wait_seconds (default 0, at most
+    BATTLE_JOB_MAX_WAIT) waits for an unfinished job, reporting its turn as progress meanwhile.
+    Returns the battle_status fields plus `result` (the llm_battle_simulator result) once it is done.
+    """
+    try:
+        job_id = req.get("job_id")
+        if not job_id:
+            raise Exception("job_id is required")
+
+        job = battle_jobs.job_queue.get(job_id)
+        deadline = time.monotonic() + min(float(req.get("wait_seconds", 0)), battle_jobs.MAX_WAIT_SECONDS)
+        reported = -1
+        while not job.finished and (remaining := deadline - time.monotonic()) > 0:
+            job = await battle_jobs.job_queue.wait(job_id, min(remaining, 1.0))
+            # Progress must strictly increase, so a poll where the turn hasn't moved reports nothing.
+            progress = BATTLE_PROGRESS_TOTAL if job.finished else job.turn
+            if progress > reported:
+                await ctx.report_progress(progress=progress, total=BATTLE_PROGRESS_TOTAL, message=job.status)
+                reported = progress
+
+        if job.status == "done":
+            return {**job.describe(), "result": job.result}
+        return job.describe()
+
+    except Exception as e:
+        logger.error(f"Battle result error: {e}")
+        raise Exception(f"Battle result failed: {str(e)}")
+
+
+@mcp.tool()
+async def pokemon_batch_lookup(req: dict) -> dict:
+    """
+    Looks up many Pokémon in one call. Expects req with pokemon_names (a list of names or Pokédex IDs).
+    Returns `pokemon` in the same order: each entry has the requested `name` and either `data` (the
+    same fields as the pokemon:// resource) or an `error`, so one unknown name doesn't fail the batch.
+    """
+    try:
+        pokemon_names = req.get("pokemon_names")
+        if not pokemon_names or not isinstance(pokemon_names, list):
+            raise Exception("pokemon_names is required (a list of names or Pokédex IDs)")
+
+        async with AsyncSession(database_client.engine) as session:
+            results = await poke_api_client.get_pokemon_details_batch([str(name) for name in pokemon_names], session)
+
+        entries = []
+        for name, result in zip(pokemon_names, results):
+            if isinstance(result, PokemonNotFoundError):
+                entries.append({"name": name, "error": str(result)})
+            elif isinstance(result, Exception):
+                logger.error(f"Error getting pokemon '{name}' in batch: {result}")
+                entries.append({"name": name, "error": f"Failed to get pokemon: {str(result)}"})
+            else:
+                entries.append({"name": name, "data": _pokemon_payload(result)})
+        return {"pokemon": entries, "found": sum("data" in entry for entry in entries)}
+
+    except Exception as e:
+        logger.error(f"Batch lookup error: {e}")
+        raise Exception(f"Batch lookup failed: {str(e)}")
+
+
+@mcp.tool()
+async def battle_replay(req: dict) -> dict:
+    """
+    Re-renders a battle from the base64 `replay` returned by llm_battle_simulator, without calling the LLM.
+    Returns the winner and battle log; strategy explanations and commentary are not part of a replay.
+    """
+    try:
+        data = req.get("replay")
+        if not data:
+            raise Exception("replay is required")
+
+        async with AsyncSession(database_client.engine) as session:
+            result = await replay.replay_battle(base64.b64decode(data), session)
+        return {"winner": result["winner"], "battle_log": result["battle_log"]}
+
+    except PokemonNotFoundError as e:
+        logger.error(f"Pokemon not found during replay: {e}")
+        raise Exception(f"Pokemon not found: {str(e)}")
+    except Exception as e:
+        logger.error(f"Replay error: {e}")
+        raise Exception(f"Replay failed: {str(e)}")
+
+
+@mcp.tool()
+async def monte_carlo_battle_simulator(req: dict) -> dict:
+    """
+    Estimates matchup odds by running thousands of seeded battles without calling the LLM.
+    Expects req with pokemon1_name and pokemon2_name, and optionally battles (default 10000) and seed.
     """
     try:
         pokemon1_name = req.get("pokemon1_name")
@@ -56,27 +308,102 @@ async def llm_battle_simulator(req: dict) -> dict:
         if not pokemon1_name or not pokemon2_name:
             raise Exception("Both pokemon1_name and pokemon2_name are required")
 
-        await database_client.init_db()
         async with AsyncSession(database_client.engine) as session:
-            # Fetch data for both Pokémon
-            pokemon1_data = await poke_api_client.get_pokemon_details(pokemon1_name, session)
-            pokemon2_data = await poke_api_client.get_pokemon_details(pokemon2_name, session)
+            pokemon1_data, pokemon2_data = await poke_api_client.get_pokemon_details_batch(
+                [pokemon1_name, pokemon2_name], session, return_exceptions=False
+            )
+
+        # CPU-bound (up to MAX_BATTLES battles), so it runs off the event loop.
+        return await asyncio.to_thread(
+            monte_carlo.simulate_matchup,
+            pokemon1_data, pokemon2_data,
+            battles=int(req.get("battles", monte_carlo.DEFAULT_BATTLES)),
+            seed=req.get("seed"),
+        )
+
+    except PokemonNotFoundError as e:
+        logger.error(f"Pokemon not found during simulation: {e}")
+        raise Exception(f"Pokemon not found: {str(e)}")
+    except Exception as e:
+        logger.error(f"Simulation error: {e}")
+        raise Exception(f"Simulation failed: {str(e)}")
 
-            # Initialize the battle engine with the data
-            engine = battle_engine.BattleEngine(pokemon1_data, pokemon2_data)
-            
-            # Run the simulation, which is now an async process controlled by the LLM
-            result = await engine.simulate_battle()
+@mcp.tool()
+async def matchup_lookup(req: dict) -> dict:
+    """
+    Answers matchup questions from the precomputed matchup matrix, without simulating battles.
+    Expects req with pokemon_name. With opponent_name, returns how the two compare: each side's
+    best-move damage and attacks needed to KO, the speed difference and the predicted winner.
+    Without it, returns the best `counters` to pokemon_name (optional limit, default 10).
+    Only covers Pokémon that were stored when the matrix was built (python -m app.services.matchups).
+    """
+    try:
+        pokemon_name = req.get("pokemon_name")
+        if not pokemon_name:
+            raise Exception("pokemon_name is required")
 
-            # Return the full result dictionary
-            return result
+        # Off the event loop: opening the matrix waits briefly if a rebuild is replacing its files.
+        matrix = await asyncio.to_thread(matchups.get_matrix)
+        opponent_name = req.get("opponent_name")
+        if opponent_name:
+            return matrix.versus(pokemon_name, opponent_name)
+        return {
+            "pokemon": matrix.names[matrix.position(pokemon_name)],
+            "counters": matrix.counters(pokemon_name, int(req.get("limit", matchups.DEFAULT_COUNTERS))),
+        }
+
+    except Exception as e:
+        logger.error(f"Matchup lookup error: {e}")
+        raise Exception(f"Matchup lookup failed: {str(e)}")
+
+@mcp.tool()
+async def tournament_simulator(req: dict, ctx: Context) -> dict:
+    """
+    Round-robin tournament: every pairing of pokemon_names (a list, or "all" for every Pokémon in the
+    database) plays `repetitions` battles (default 100) across a pool of worker processes.
+    Optional: engine ("montecarlo" default, "greedy" or "expectiminimax"), seed, workers (at most the CPU count).
+    Returns a win-rate matrix (row beats column) and an Elo-style ranking; progress is reported per batch of pairings.
+    """
+    try:
+        pokemon_names = req.get("pokemon_names")
+        if not pokemon_names:
+            raise Exception("pokemon_names is required (a list of names, or \"all\")")
+
+        if pokemon_names == "all":
+            names = await tournament.resolve_names(None, database_client.DATABASE_URL)
+        else:
+            if isinstance(pokemon_names, str):
+                pokemon_names = [pokemon_names]
+            if not isinstance(pokemon_names, list):
+                raise Exception("pokemon_names must be a list of names, or \"all\"")
+            # Fetches anything not stored yet, so the workers can load every entrant from SQLite.
+            pokemon_names = [str(name) for name in pokemon_names]
+            names = []
+            async with AsyncSession(database_client.engine) as session:
+                for start in range(0, len(pokemon_names), poke_api_client.MAX_BATCH_NAMES):
+                    entrants = await poke_api_client.get_pokemon_details_batch(
+                        pokemon_names[start:start + poke_api_client.MAX_BATCH_NAMES], session, return_exceptions=False
+                    )
+                    names.extend(pokemon.name for pokemon in entrants)
+
+        async def report(done: int, total: int):
+            await ctx.report_progress(progress=done, total=total, message=f"{done}/{total} pairings played")
+
+        return await tournament.run_tournament(
+            list(dict.fromkeys(names)), database_client.DATABASE_URL,
+            repetitions=int(req.get("repetitions", tournament.DEFAULT_REPETITIONS)),
+            engine=req.get("engine", "montecarlo"),
+            workers=req.get("workers"),
+            seed=req.get("seed"),
+            on_progress=report,
+        )
 
     except PokemonNotFoundError as e:
-        logger.error(f"Pokemon not found during battle: {e}")
+        logger.error(f"Pokemon not found during tournament: {e}")
         raise Exception(f"Pokemon not found: {str(e)}")
     except Exception as e:
-        logger.error(f"Battle error: {e}")
-        raise Exception(f"Battle failed: {str(e)}")
+        logger.error(f"Tournament error: {e}")
+        raise Exception(f"Tournament failed: {str(e)}")
 
 if __name__ == "__main__":
     try:
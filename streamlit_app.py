@@ -4,37 +4,42 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from dotenv import load_dotenv
 import os
 
-from app.services import poke_api_client, battle_engine, database_client
+from app.services import poke_api_client, battle_engine, database_client, http_client
 from app.services.poke_api_client import PokemonNotFoundError
 
 # Load environment variables from your .env file
 load_dotenv()
 
 # --- Async Helper Functions ---
-def run_async(coro):
-    """Helper to run async code in Streamlit's sync environment."""
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
-
 async def get_pokemon_data(pokemon_name):
     """Fetches comprehensive data for a single Pokémon."""
     async with AsyncSession(database_client.engine) as session:
         return await poke_api_client.get_pokemon_details(pokemon_name, session)
 
-async def run_battle(p1_name, p2_name):
-    """Initializes and runs the entire battle simulation."""
+def iterate_async(agen):
+    """Drives an async generator from Streamlit's sync script, one item at a time on a single loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        # The pooled PokéAPI client is bound to this loop; close it before the loop goes away.
+        loop.run_until_complete(http_client.close_client())
+        loop.close()
+
+async def battle_events(p1_name, p2_name):
+    """Yields (p1_data, p2_data) first, then every BattleEvent as soon as the engine produces it."""
     await database_client.init_db()
     p1_data = await get_pokemon_data(p1_name)
     p2_data = await get_pokemon_data(p2_name)
+    yield p1_data, p2_data
 
-    if p1_data and p2_data:
-        engine = battle_engine.BattleEngine(p1_data, p2_data)
-        return await engine.simulate_battle(), p1_data, p2_data
-    return None, None, None
+    engine = battle_engine.BattleEngine(p1_data, p2_data)
+    async for event in engine.stream_battle():
+        yield event
 
 # --- Streamlit Page Configuration ---
 st.set_page_config(page_title="Pokémon LLM Battle Simulator", page_icon="⚔️", layout="wide")
@@ -57,14 +62,28 @@ if 'battle_result' not in st.session_state:
 if st.button("Simulate Battle!", use_container_width=True, type="primary"):
     st.session_state.battle_result = None # Clear previous results
     if pokemon1_name and pokemon2_name:
-        with st.spinner(f"The LLM is simulating a strategic battle... This may take a moment."):
-            result, p1_data, p2_data = run_async(run_battle(pokemon1_name, pokemon2_name))
-            if result:
-                st.session_state.battle_result = result
-                st.session_state.p1_data = p1_data
-                st.session_state.p2_data = p2_data
-            else:
-                st.error("Could not fetch data for one or both Pokémon. Please check the names.")
+        live = st.empty()
+        try:
+            with live.container():
+                st.info("The LLM is simulating a strategic battle... Turns appear as they are played.")
+                events = iterate_async(battle_events(pokemon1_name, pokemon2_name))
+                p1_data, p2_data = next(events)
+                battle_log, commentary_log, winner = [], [], None
+                for event in events:
+                    for line in event.battle_log:
+                        st.markdown(line, unsafe_allow_html=True)
+                    for line in event.commentary:
+                        st.markdown(f"🎤 _{line}_")
+                    battle_log.extend(event.battle_log)
+                    commentary_log.extend(event.commentary)
+                    winner = event.winner or winner
+            live.empty()
+            st.session_state.battle_result = {"winner": winner, "battle_log": battle_log, "commentary_log": commentary_log}
+            st.session_state.p1_data = p1_data
+            st.session_state.p2_data = p2_data
+        except PokemonNotFoundError:
+            live.empty()
+            st.error("Could not fetch data for one or both Pokémon. Please check the names.")
     else:
         st.warning("Please enter the names of both Pokémon.")
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Concurrent writers storing the same Pokémon must end up with exactly one copy of it
+"""
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import func
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.pydantic_models import AbilityInfo, EvolutionInfo, MoveInfo, PokemonData, Stat
+from app.services.database_client import (
+    Pokemon, PokemonMoveLink, PokemonSnapshot, PokemonTypeLink, Stat as db_Stat,
+    add_pokemon_batch_to_db, create_database_engine,
+)
+
+WRITERS = 8
+
+
+def _pikachu() -> PokemonData:
+    return PokemonData(
+        id=25,
+        name="pikachu",
+        types=["electric"],
+        base_stats=[Stat(name=name, base_stat=value) for name, value in
+                    [("hp", 35), ("attack", 55), ("defense", 40), ("special-attack", 50), ("special-defense", 50), ("speed", 90)]],
+        abilities=[AbilityInfo(name="static", is_hidden=False)],
+        moves=[MoveInfo(name="thunderbolt", power=90, move_type="electric", damage_class="special"),
+               MoveInfo(name="quick-attack", power=40, move_type="normal", damage_class="physical")],
+        evolution=EvolutionInfo(chain=["pichu", "pikachu", "raichu"]),
+    )
+
+
+async def _store_concurrently(database_url: str):
+    engine = create_database_engine(database_url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        async def store():
+            async with AsyncSession(engine) as session:
+                return await add_pokemon_batch_to_db([_pikachu()], session)
+
+        inserted = await asyncio.gather(*(store() for _ in range(WRITERS)))
+
+        async with AsyncSession(engine) as session:
+            async def count(model):
+                return (await session.exec(select(func.count()).select_from(model))).one()
+            return inserted, {model.__name__: await count(model)
+                              for model in (Pokemon, PokemonTypeLink, PokemonMoveLink, db_Stat, PokemonSnapshot)}
+    finally:
+        await engine.dispose()
+
+
+def test_concurrent_inserts_store_one_pokemon():
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(directory, 'pokemon.db')}"
+        inserted, counts = asyncio.run(_store_concurrently(database_url))
+
+    assert sorted(inserted) == [0] * (WRITERS - 1) + [1]
+    assert counts == {"Pokemon": 1, "PokemonTypeLink": 1, "PokemonMoveLink": 2, "Stat": 6, "PokemonSnapshot": 1}
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Replays must round-trip: a recorded battle re-runs to the same event log
+"""
+import asyncio
+
+import pytest
+
+from app.models.pydantic_models import AbilityInfo, EvolutionInfo, MoveInfo, PokemonData, Stat
+from app.services import replay
+from app.services.battle_engine import BattleEngine, LogCode
+from app.services.strategies import get_strategy
+
+SEEDS = range(40)
+
+
+def _pokemon(pokedex_id: int, name: str, types, stats, moves) -> PokemonData:
+    stat_names = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+    return PokemonData(
+        id=pokedex_id,
+        name=name,
+        types=types,
+        base_stats=[Stat(name=stat, base_stat=value) for stat, value in zip(stat_names, stats)],
+        abilities=[AbilityInfo(name="static", is_hidden=False)],
+        moves=[MoveInfo(name=move, power=power, move_type=move_type, damage_class=damage_class)
+               for move, power, move_type, damage_class in moves],
+        evolution=EvolutionInfo(chain=[name]),
+    )
+
+
+PIKACHU = _pokemon(25, "pikachu", ["electric"], (35, 55, 40, 50, 50, 90), [
+    ("thunderbolt", 90, "electric", "special"), ("quick-attack", 40, "normal", "physical"),
+    ("iron-tail", 100, "steel", "physical"), ("thunder-wave", 0, "electric", "status"),
+])
+BULBASAUR = _pokemon(1, "bulbasaur", ["grass", "poison"], (45, 49, 49, 65, 65, 45), [
+    ("vine-whip", 45, "grass", "physical"), ("razor-leaf", 55, "grass", "physical"),
+    ("sludge-bomb", 90, "poison", "special"), ("solar-beam", 120, "grass", "special"),
+])
+
+
+def _replayable(events):
+    # Strategy explanations are not part of a replay.
+    return [event for event in events if event[0] != LogCode.STRATEGY]
+
+
+async def _record_and_replay(seed: int):
+    recorded = BattleEngine(PIKACHU, BULBASAUR, strategy=get_strategy("greedy"), seed=seed)
+    result = await recorded.simulate_battle()
+
+    data = replay.encode(replay.from_engine(recorded))
+    decoded = replay.decode(data)
+    replayed = BattleEngine(PIKACHU, BULBASAUR, strategy=replay.ReplayStrategy(decoded.choices), seed=decoded.seed)
+    replayed_result = await replayed.simulate_battle()
+    return recorded, result, decoded, replayed, replayed_result
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_replay_round_trip(seed):
+    recorded, result, decoded, replayed, replayed_result = asyncio.run(_record_and_replay(seed))
+
+    assert decoded == replay.from_engine(recorded)
+    assert (decoded.pokemon1_id, decoded.pokemon2_id) == (PIKACHU.id, BULBASAUR.id)
+    assert _replayable(replayed.events) == _replayable(recorded.events)
+    assert replayed_result["winner"] == result["winner"]
+    assert replayed.choices == recorded.choices
+
+
+def test_decode_rejects_bad_data():
+    data = replay.encode(replay.Replay(seed=7, pokemon1_id=25, pokemon2_id=1, choices=[0, 2, -1]))
+    with pytest.raises(ValueError):
+        replay.decode(data[:-1])
+    with pytest.raises(ValueError):
+        replay.decode(b"XXXX" + data[4:])